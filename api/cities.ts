@@ -7,7 +7,9 @@ export default async function handler(req: VercelRequest, res: VercelResponse) {
   }
 
   try {
-    const cities = await storage.getCities();
+    // Same as /api/cities in server/routes.ts: ?q= is a typeahead prefix
+    const prefix = typeof req.query.q === 'string' ? req.query.q : undefined;
+    const cities = await storage.getCities(prefix);
     res.json(cities);
   } catch (error) {
     console.error("Error fetching cities:", error);
@@ -16,6 +16,7 @@ export interface InsertProperty {
   hasGarden: boolean;
   hasParking: boolean;
   isArticle4: boolean;
+  article4Area?: string;
   yearlyProfit: number;
   leftInDeal: number;
 }
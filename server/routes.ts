@@ -82,7 +82,8 @@ export async function registerRoutes(app: Express): Promise<Server> {
       res.setHeader('Content-Type', 'application/json');
       res.setHeader('Cache-Control', 'public, max-age=3600'); // Cache cities for 1 hour
       
-      const cities = await storage.getCities();
+      const prefix = typeof req.query.q === 'string' ? req.query.q : undefined;
+      const cities = await storage.getCities(prefix);
       res.status(200).json(cities);
     } catch (error) {
       console.error("❌ Error fetching cities:", error);
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""Article 4 direction lookup: is a listing inside an area where HMO conversion needs planning permission?
+
+Boundaries come from locally supplied council GeoJSON (Polygon/MultiPolygon
+features). They are packed into a static R-tree (Sort-Tile-Recursive) of
+bounding boxes, so a lookup only runs exact point-in-polygon tests on the few
+polygons whose box contains the point. The built index is pickled next to
+the GeoJSON, keyed on its size and mtime, so later processes skip reparsing.
+
+    python3 article4.py build article4_areas.geojson
+    python3 article4.py lookup 53.80,-1.55
+"""
+import os
+import sys
+import json
+import math
+import pickle
+import tempfile
+
+from postcode_geo import get_default_table, postcode_keys
+
+NODE_CAPACITY = 16
+INDEX_VERSION = 1
+
+DEFAULT_GEOJSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'article4_areas.geojson')
+
+
+def point_in_ring(x, y, ring):
+    """Ray casting; ring is a list of (x, y) = (lon, lat) vertices"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i]
+        xj, yj = ring[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(x, y, polygon):
+    """polygon = [outer ring, hole, hole, ...]"""
+    if not point_in_ring(x, y, polygon[0]):
+        return False
+    return not any(point_in_ring(x, y, hole) for hole in polygon[1:])
+
+
+def _bounds(polygon):
+    xs = [p[0] for p in polygon[0]]
+    ys = [p[1] for p in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _union(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _str_pack(entries):
+    """Group (box, payload) entries into nodes Sort-Tile-Recursive style"""
+    n = len(entries)
+    node_count = math.ceil(n / NODE_CAPACITY)
+    slices = math.ceil(math.sqrt(node_count))
+    per_slice = slices * NODE_CAPACITY
+
+    entries = sorted(entries, key=lambda e: (e[0][0] + e[0][2]) / 2)
+    nodes = []
+    for s in range(0, n, per_slice):
+        vertical = sorted(entries[s:s + per_slice], key=lambda e: (e[0][1] + e[0][3]) / 2)
+        for k in range(0, len(vertical), NODE_CAPACITY):
+            children = vertical[k:k + NODE_CAPACITY]
+            nodes.append((_union([c[0] for c in children]), children))
+    return nodes
+
+
+class Article4Index:
+    """Static R-tree over Article 4 polygons"""
+
+    def __init__(self, polygons):
+        # polygons: [(name, [ring, hole, ...])]
+        self.polygons = polygons
+        self.root = None
+        if polygons:
+            level = [(_bounds(rings), ('leaf', i)) for i, (_, rings) in enumerate(polygons)]
+            while len(level) > NODE_CAPACITY:
+                level = _str_pack(level)
+            self.root = (_union([e[0] for e in level]), level)
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        features = data.get('features', [data] if data.get('type') == 'Feature' else [])
+
+        polygons = []
+        for feature in features:
+            geometry = feature.get('geometry') or {}
+            props = feature.get('properties') or {}
+            name = props.get('name') or props.get('NAME') or props.get('council') or ''
+            if geometry.get('type') == 'Polygon':
+                shapes = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiPolygon':
+                shapes = geometry['coordinates']
+            else:
+                continue
+            for shape in shapes:
+                rings = [[(float(p[0]), float(p[1])) for p in ring] for ring in shape if ring]
+                if rings:
+                    polygons.append((name, rings))
+        return cls(polygons)
+
+    def _candidates(self, x, y):
+        if not self.root:
+            return
+        stack = [self.root]
+        while stack:
+            box, children = stack.pop()
+            if not (box[0] <= x <= box[2] and box[1] <= y <= box[3]):
+                continue
+            for child_box, payload in children:
+                if not (child_box[0] <= x <= child_box[2] and child_box[1] <= y <= child_box[3]):
+                    continue
+                if isinstance(payload, tuple) and payload[0] == 'leaf':
+                    yield payload[1]
+                else:
+                    stack.append((child_box, payload))
+
+    def to_state(self):
+        """Plain tuples/lists only, so the pickle doesn't depend on how this module was imported"""
+        return self.polygons, self.root
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        index.polygons, index.root = state
+        return index
+
+    def find(self, lat, lon):
+        """Name of the Article 4 area containing the point, or None"""
+        for i in self._candidates(lon, lat):
+            name, rings = self.polygons[i]
+            if point_in_polygon(lon, lat, rings):
+                return name or 'Article 4 area'
+        return None
+
+    def contains(self, lat, lon):
+        return self.find(lat, lon) is not None
+
+
+def _cache_path(geojson_path):
+    return geojson_path + '.idx.pickle'
+
+
+def load_index(geojson_path):
+    """Load the pickled index for this GeoJSON, rebuilding it if the source changed"""
+    stat = os.stat(geojson_path)
+    signature = (INDEX_VERSION, stat.st_size, int(stat.st_mtime))
+    cache_path = _cache_path(geojson_path)
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_signature, state = pickle.load(f)
+        if cached_signature == signature:
+            return Article4Index.from_state(state)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        pass
+
+    index = Article4Index.from_geojson(geojson_path)
+    tmp_path = None
+    try:
+        # A temp file per writer: processes building at once mustn't interleave into one file
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(cache_path) or '.', prefix='.article4-',
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            pickle.dump((signature, index.to_state()), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Couldn't cache Article 4 index: {e}", file=sys.stderr)
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    print(f"🏛️ Built Article 4 index: {len(index.polygons)} polygons from {geojson_path}", file=sys.stderr)
+    return index
+
+
+_default_index = None
+_default_index_loaded = False
+
+
+def get_default_index():
+    """Index for SCRAPER_ARTICLE4_GEOJSON (or server/data/article4_areas.geojson); None if not supplied"""
+    global _default_index, _default_index_loaded
+    if not _default_index_loaded:
+        _default_index_loaded = True
+        path = os.environ.get('SCRAPER_ARTICLE4_GEOJSON', DEFAULT_GEOJSON_PATH)
+        if os.path.exists(path):
+            try:
+                _default_index = load_index(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Article 4 boundaries unavailable ({e}), skipping Article 4 tagging", file=sys.stderr)
+    return _default_index
+
+
+def sector_area(index, table, sector):
+    """(decided, area) for a postcode sector: decided only if all its postcodes fall on one side of every boundary"""
+    areas = {index.find(lat, lon) for lat, lon in table.sector_points(sector)}
+    if len(areas) != 1:
+        return False, None
+    return True, areas.pop()
+
+
+def tag_article4(listings, index=None, table=None):
+    """Set is_article_4 on every listing with a precise location; returns how many are inside an area
+
+    A listing's point is only trusted when it is its own postcode's
+    (geocode_resolution 'unit'), or its sector's where every postcode of that
+    sector lands on the same side of the boundaries. A district centroid - or
+    a sector straddling a boundary - says nothing about which side the
+    property is on, so its Article 4 status is left unknown (unset). Listings
+    stored without a resolution are looked up again in the postcode table.
+    """
+    index = index or get_default_index()
+    if not index:
+        return 0
+    table = table or get_default_table()
+    inside = 0
+    unknown = 0
+    sectors = {}
+    for listing in listings:
+        lat, lon = listing.get('latitude'), listing.get('longitude')
+        if lat is None or lon is None:
+            continue
+        postcode = listing.get('postcode')
+        resolution = listing.get('geocode_resolution')
+        if resolution is None and table and postcode:
+            located = table.locate(postcode)
+            resolution = located[2] if located else None
+        if resolution == 'unit':
+            area = index.find(lat, lon)
+        elif resolution == 'sector' and table:
+            sector = postcode_keys(postcode)[1]
+            if sector not in sectors:
+                sectors[sector] = sector_area(index, table, sector)
+            decided, area = sectors[sector]
+            if not decided:
+                unknown += 1
+                continue
+        else:
+            unknown += 1
+            continue
+        listing['is_article_4'] = area is not None
+        if area:
+            listing['article_4_area'] = area
+            inside += 1
+    if unknown:
+        print(f"🏛️ Article 4 status unknown for {unknown} listings located only to a postcode district or boundary-straddling sector", file=sys.stderr)
+    return inside
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == 'build':
+        index = load_index(sys.argv[2])
+        print(f"✅ {len(index.polygons)} polygons indexed -> {_cache_path(sys.argv[2])}", file=sys.stderr)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'lookup':
+        index = get_default_index()
+        if not index:
+            print("❌ No Article 4 GeoJSON found (set SCRAPER_ARTICLE4_GEOJSON)", file=sys.stderr)
+            sys.exit(1)
+        for point in sys.argv[2:]:
+            lat, lon = (float(v) for v in point.split(','))
+            print(f"{lat},{lon}\t{index.find(lat, lon)}")
+    else:
+        print("Usage: python article4.py build <areas.geojson>\n"
+              "       python article4.py lookup <lat,lon> [...]", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import threading
+
+import pytest
+
+import prime_scraper
+import rent_sketch
+from mock_portal import create_server
+from rent_sketch import RentSketches
+
+
+@pytest.fixture
+def portal_url(monkeypatch):
+    """Base URL of an in-process stand-in portal, with no request delays and no stored rents"""
+    monkeypatch.setattr(prime_scraper, 'DELAY_SCALE', 0)
+    monkeypatch.setattr(rent_sketch, '_default_sketches', RentSketches())
+    server = create_server(latency_ms=0, jitter_ms=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
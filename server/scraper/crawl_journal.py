@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Append-only crawl journal so an interrupted scrape can resume where it stopped"""
+import os
+import sys
+import json
+import time
+import hashlib
+
+
+def default_journal_dir():
+    """Journal lives next to the Node scrape cache (/tmp in production, .local otherwise)"""
+    configured = os.environ.get('SCRAPER_JOURNAL_DIR')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/scrape_journal'
+    return os.path.join('.local', 'scrape_journal')
+
+
+def query_key(city, min_bedrooms, max_price, keywords):
+    """Same key shape as ScrapingService.generateSearchHash so journals line up with cache entries"""
+    key = f"{city}-{min_bedrooms}-{max_price}-{keywords}"
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+class CrawlJournal:
+    """JSON-lines journal of finished URLs and the listings extracted from them.
+
+    Every record is flushed to the OS as soon as it is written, so a killed
+    process loses at most the URL it was working on. Listings are only
+    restored for URLs that were marked done; a half-processed URL is simply
+    fetched again on resume.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done_urls = set()
+        self.listings = []
+        self._file = None
+
+    @classmethod
+    def for_query(cls, city, min_bedrooms, max_price, keywords, journal_dir=None):
+        journal_dir = journal_dir or default_journal_dir()
+        name = query_key(city, min_bedrooms, max_price, keywords) + '.jsonl'
+        return cls(os.path.join(journal_dir, name))
+
+    def open(self, resume=True):
+        """Load any unfinished journal for this query, then open it for appending"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        if resume and os.path.exists(self.path):
+            self._load()
+        else:
+            self.done_urls = set()
+            self.listings = []
+
+        mode = 'a' if self.done_urls else 'w'
+        torn = mode == 'a' and not self._ends_with_newline()
+        self._file = open(self.path, mode, encoding='utf-8')
+        if mode == 'w':
+            self._write({'event': 'start', 'ts': time.time()})
+        elif torn:
+            # End the torn line, or the next record would be glued onto it and lost on the next resume
+            self._file.write('\n')
+        return self
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if not f.tell():
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _load(self):
+        pending = {}
+        completed = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a hard kill - everything before it is intact
+                    continue
+                event = record.get('event')
+                if event == 'listing':
+                    pending.setdefault(record['url'], []).append(record['property'])
+                elif event == 'url_done':
+                    self.done_urls.add(record['url'])
+                elif event == 'complete':
+                    completed = True
+
+        if completed:
+            # Previous run finished cleanly; nothing to resume
+            self.done_urls = set()
+            self.listings = []
+            return
+
+        for url in self.done_urls:
+            self.listings.extend(pending.get(url, []))
+        if self.done_urls:
+            print(f"♻️ Resuming from journal: {len(self.done_urls)} URLs done, {len(self.listings)} listings restored", file=sys.stderr)
+
+    def _write(self, record):
+        if not self._file:
+            return
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def is_done(self, url):
+        return url in self.done_urls
+
+    def record_listing(self, url, property_data):
+        self._write({'event': 'listing', 'url': url, 'property': property_data})
+
+    def mark_url_done(self, url, found=0):
+        self.done_urls.add(url)
+        self._write({'event': 'url_done', 'url': url, 'found': found, 'ts': time.time()})
+
+    def flush(self):
+        """Push buffered records all the way to disk (used from the SIGTERM handler)"""
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def complete(self):
+        """Query finished - the journal is no longer needed"""
+        self._write({'event': 'complete', 'ts': time.time()})
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Columnar export of scraped listings and their investment metrics.
+
+Listings are written as Parquet under a Hive-partitioned directory tree,
+one file per export run and partition:
+
+    <root>/city=leeds/scrape_date=2026-10-19/part-1760832000-3f2a9c1d.parquet
+
+Columns are typed to fit the data (int32 prices and rents, int8 bedrooms,
+float64 yields and coordinates, a UTC timestamp); a value that is missing,
+non-numeric or out of range for its column is stored as null. Low-cardinality strings (portal, postcode district,
+profitability, Article 4 area) are stored dictionary-encoded. Files use zstd
+and keep per-row-group min/max statistics, with rows sorted by price. A
+filter on city or date skips whole directories. Filters on price, bedrooms
+and yield skip files and row groups using their statistics. `compact`
+merges a partition's per-run files into one file, which keeps scans over
+months of history fast.
+
+pyarrow is optional: without it exports are skipped with a warning.
+
+    python3 prime_scraper.py Leeds 4 300000 HMO --export-parquet exports/
+    python3 export_sink.py export exports/ .local/scrape_cache.json .local/warm_cache
+    python3 export_sink.py scan exports/ --city Leeds --since 2026-09-01 --max-price 250000 --min-yield 8
+    python3 export_sink.py compact exports/
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import date, datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# What a best-effort export may raise (pyarrow's ArrowInvalid is also a ValueError)
+EXPORT_ERRORS = (OSError, ValueError) + ((pa.ArrowException,) if pa is not None else ())
+
+from gazetteer import get_gazetteer
+from postcode_geo import extract_postcode
+from price_history import PORTAL_CODES, listing_key
+
+ROW_GROUP_SIZE = 64 * 1024
+# Node cache keys -> scraper output keys
+CAMEL_CASE_KEYS = {'propertyUrl': 'property_url', 'imageUrl': 'image_url', 'scrapedAt': 'scraped_at'}
+
+# (column, arrow type name, how to read it from a listing)
+INT, FLOAT, STR, DICT, BOOL = 'int', 'float', 'str', 'dict', 'bool'
+COLUMNS = (
+    ('listing_key', 'uint64', None),
+    ('scraped_at', 'timestamp', None),
+    ('portal', DICT, None),
+    ('title', STR, None),
+    ('address', STR, None),
+    ('postcode', STR, None),
+    ('postcode_district', DICT, None),
+    ('latitude', 'float64', FLOAT),
+    ('longitude', 'float64', FLOAT),
+    ('price', 'int32', INT),
+    ('bedrooms', 'int8', INT),
+    ('bathrooms', 'int8', INT),
+    ('area_sqm', 'int32', INT),
+    ('property_url', STR, None),
+    ('image_url', STR, None),
+    ('monthly_rent', 'int32', INT),
+    ('annual_rent', 'int32', INT),
+    ('gross_yield', 'float64', FLOAT),
+    ('deposit_required', 'int32', INT),
+    ('mortgage_amount', 'int32', INT),
+    ('annual_costs', 'int32', INT),
+    ('net_annual_income', 'int32', INT),
+    ('roi_on_deposit', 'float64', FLOAT),
+    ('price_per_sqm', 'int32', INT),
+    ('profitability_score', DICT, None),
+    ('is_article_4', BOOL, None),
+    ('article_4_area', DICT, None),
+    ('previous_price', 'int32', INT),
+    ('days_on_market', 'int32', INT),
+)
+
+
+def _arrow_type(name):
+    if name == STR:
+        return pa.string()
+    if name == DICT:
+        return pa.dictionary(pa.int32(), pa.string())
+    if name == BOOL:
+        return pa.bool_()
+    if name == 'timestamp':
+        return pa.timestamp('ms', tz='UTC')
+    return getattr(pa, name)()
+
+
+def listing_schema():
+    return pa.schema([(name, _arrow_type(kind)) for name, kind, _ in COLUMNS])
+
+
+def partitioning():
+    return ds.partitioning(pa.schema([('city', pa.string()), ('scrape_date', pa.date32())]), flavor='hive')
+
+
+# Representable range of each integer column type; values outside it are stored as null
+INT_RANGES = {'int8': (-2 ** 7, 2 ** 7 - 1), 'int32': (-2 ** 31, 2 ** 31 - 1)}
+
+
+def _number(value, kind, type_name=None):
+    """value as an int/float, or None if it is missing, non-numeric or out of range for type_name
+
+    Card text can yield nonsense (extract_price joins every digit it sees), and
+    one bad value must not make pyarrow reject the whole export.
+    """
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number != number or number in (float('inf'), float('-inf')):
+        return None
+    if kind != INT:
+        return number
+    low, high = INT_RANGES.get(type_name, (None, None))
+    number = int(number)
+    if low is not None and not low <= number <= high:
+        return None
+    return number
+
+
+def _column_value(value, kind):
+    """value if it fits a string/bool column, else None (or its str form for strings)"""
+    if value is None:
+        return None
+    if kind == BOOL:
+        return value if isinstance(value, bool) else None
+    return value if isinstance(value, str) else str(value)
+
+
+def _portal(url):
+    return next((name for name in PORTAL_CODES if name in (url or '')), None)
+
+
+def listings_to_table(listings, timestamps):
+    """Typed Arrow table (without the partition columns), rows sorted by price
+
+    timestamps: epoch seconds each listing was scraped at.
+    """
+    listings = [{CAMEL_CASE_KEYS.get(k, k): v for k, v in listing.items()} for listing in listings]
+    columns = {}
+    for name, kind, convert in COLUMNS:
+        if name == 'listing_key':
+            values = [listing_key(l) for l in listings]
+        elif name == 'scraped_at':
+            values = [ts * 1000 for ts in timestamps]
+        elif name == 'portal':
+            values = [_portal(l.get('property_url')) for l in listings]
+        elif name == 'postcode_district':
+            values = [((l.get('postcode') or extract_postcode(l.get('address')) or '').split() or [None])[0]
+                      for l in listings]
+        elif convert:
+            values = [_number(l.get(name), convert, kind) for l in listings]
+        else:
+            values = [_column_value(l.get(name), kind) for l in listings]
+
+        if kind == DICT:
+            columns[name] = pa.array(values, pa.string()).dictionary_encode()
+        else:
+            columns[name] = pa.array(values, _arrow_type(kind))
+    table = pa.table(columns, schema=listing_schema())
+    return table.sort_by([('price', 'ascending')])
+
+
+def _scrape_time(listing, default):
+    """Epoch seconds from the listing's own scraped_at/scrapedAt if it has one"""
+    value = listing.get('scraped_at') or listing.get('scrapedAt')
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+def _write_file(table, directory):
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{int(time.time())}-{uuid.uuid4().hex[:8]}.parquet"
+    # Dot-prefixed while being written: dataset discovery ignores it until the rename
+    tmp_path = os.path.join(directory, '.' + name + '.tmp')
+    pq.write_table(table, tmp_path, compression='zstd', row_group_size=ROW_GROUP_SIZE,
+                   use_dictionary=True, write_statistics=True)
+    path = os.path.join(directory, name)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_listings(listings, root, city=None, scraped_at=None):
+    """Append listings to the dataset at root; returns the files written.
+
+    Each listing goes to the partition for its city (listing's own, else city)
+    and the UTC date it was scraped (its own timestamp, else scraped_at, else now).
+    """
+    if pa is None:
+        print("⚠️ pyarrow not installed, skipping Parquet export", file=sys.stderr)
+        return []
+
+    scraped_at = scraped_at or time.time()
+    gazetteer = get_gazetteer()
+    partitions = {}
+    for listing in listings:
+        listing_city = listing.get('city') or city
+        if not listing_city:
+            continue
+        ts = int(_scrape_time(listing, scraped_at))
+        day = datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
+        group = partitions.setdefault((gazetteer.slug(listing_city), day), ([], []))
+        group[0].append(listing)
+        group[1].append(ts)
+
+    paths = []
+    for (slug, day), (group, timestamps) in sorted(partitions.items()):
+        paths.append(_write_file(listings_to_table(group, timestamps),
+                                 os.path.join(root, f"city={slug}", f"scrape_date={day}")))
+    print(f"📦 Exported {sum(len(g) for g, _ in partitions.values())} listings to {len(paths)} Parquet files under {root}",
+          file=sys.stderr)
+    return paths
+
+
+def listing_filter(city=None, since=None, until=None, min_price=None, max_price=None, min_bedrooms=None,
+                   max_bedrooms=None, min_yield=None):
+    """Dataset filter expression from the common query bounds (None = unbounded)"""
+    bounds = [
+        (ds.field('city'), '==', get_gazetteer().slug(city) if city else None),
+        (ds.field('scrape_date'), '>=', since),
+        (ds.field('scrape_date'), '<=', until),
+        (ds.field('price'), '>=', min_price),
+        (ds.field('price'), '<=', max_price),
+        (ds.field('bedrooms'), '>=', min_bedrooms),
+        (ds.field('bedrooms'), '<=', max_bedrooms),
+        (ds.field('gross_yield'), '>=', min_yield),
+    ]
+    expression = None
+    for field, op, value in bounds:
+        if value is None:
+            continue
+        term = field == value if op == '==' else field >= value if op == '>=' else field <= value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def scan(root, columns=None, **bounds):
+    """Arrow table of the listings under root matching bounds (see listing_filter)"""
+    dataset = ds.dataset(root, format='parquet', partitioning=partitioning())
+    return dataset.to_table(columns=columns, filter=listing_filter(**bounds))
+
+
+def compact(root):
+    """Rewrite every partition that has several files as a single price-sorted file"""
+    compacted = 0
+    for directory, _, names in os.walk(root):
+        parts = sorted(name for name in names if name.endswith('.parquet') and not name.startswith('.'))
+        if len(parts) < 2:
+            continue
+        paths = [os.path.join(directory, name) for name in parts]
+        table = pa.concat_tables([pq.read_table(path, schema=listing_schema()) for path in paths])
+        _write_file(table.sort_by([('price', 'ascending')]), directory)
+        for path in paths:
+            os.remove(path)
+        compacted += 1
+        print(f"🗜️ {directory}: {len(paths)} files -> 1 ({table.num_rows} listings)", file=sys.stderr)
+    return compacted
+
+
+def stored_listing_groups(path, city=None):
+    """(listings, city, scraped_at) groups from a scraper output, warm cache entry or the Node cache"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    mtime = os.path.getmtime(path)
+    if isinstance(data, list):
+        return [(data, city, mtime)]
+    if 'properties' in data:
+        return [(data['properties'], (data.get('query') or {}).get('city') or city, data.get('scraped_at', mtime))]
+    # Node cache: each property records its city and scrapedAt
+    return [(entry.get('properties', []), city, mtime) for entry in data.values() if isinstance(entry, dict)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet export and scans of scraped listings")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help="Export stored listings (JSON output, warm cache, Node cache)")
+    export.add_argument('root')
+    export.add_argument('paths', nargs='+', help="Files, or directories of .json files (the warm cache)")
+    export.add_argument('--city', help="City for listings whose store doesn't record one")
+
+    query = sub.add_parser('scan', help="Filtered scan, printed as JSON")
+    query.add_argument('root')
+    query.add_argument('--city')
+    query.add_argument('--since', type=date.fromisoformat, help="First scrape date (YYYY-MM-DD)")
+    query.add_argument('--until', type=date.fromisoformat, help="Last scrape date (YYYY-MM-DD)")
+    query.add_argument('--min-price', type=int)
+    query.add_argument('--max-price', type=int)
+    query.add_argument('--min-bedrooms', type=int)
+    query.add_argument('--max-bedrooms', type=int)
+    query.add_argument('--min-yield', type=float)
+    query.add_argument('--columns', help="Comma-separated columns to read (default: all)")
+    query.add_argument('--limit', type=int, default=100, help="Listings to print (0 = only the count)")
+
+    compact_cmd = sub.add_parser('compact', help="Merge each partition's files into one")
+    compact_cmd.add_argument('root')
+
+    args = parser.parse_args()
+    if pa is None:
+        print("❌ pyarrow is required: pip install pyarrow", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == 'export':
+        from reanalyse import expand_targets
+        for path in expand_targets(args.paths):
+            try:
+                for listings, city, scraped_at in stored_listing_groups(path, args.city):
+                    export_listings(listings, args.root, city, scraped_at)
+            except EXPORT_ERRORS as e:
+                print(f"❌ Couldn't export {path}: {e}", file=sys.stderr)
+    elif args.command == 'scan':
+        started = time.time()
+        columns = [c.strip() for c in args.columns.split(',')] if args.columns else None
+        table = scan(args.root, columns, city=args.city, since=args.since, until=args.until,
+                     min_price=args.min_price, max_price=args.max_price, min_bedrooms=args.min_bedrooms,
+                     max_bedrooms=args.max_bedrooms, min_yield=args.min_yield)
+        print(f"🔎 {table.num_rows} listings in {time.time() - started:.2f}s", file=sys.stderr)
+        if args.limit:
+            if 'gross_yield' in table.column_names:
+                table = table.take(pc.sort_indices(table, [('gross_yield', 'descending')])[:args.limit])
+            rows = table.slice(0, args.limit).to_pylist()
+            print(json.dumps(rows, ensure_ascii=False, indent=2, default=str))
+    else:
+        print(f"✅ Compacted {compact(args.root)} partitions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""UK town gazetteer: portal slugs, aliases, postcode areas and rent tiers.
+
+The source table is server/data/uk_towns.json (or SCRAPER_GAZETTEER). It is
+compiled once into lookup tables - exact names/aliases/slugs, postcode areas,
+and a flattened prefix trie that maps every prefix to its top matches in
+table order - and pickled next to the source, so loading it at startup is a
+single unpickle and every lookup is one dict access.
+
+    python3 gazetteer.py build
+    python3 gazetteer.py resolve "newcastle" "LS9 8AB"
+    python3 gazetteer.py suggest bri
+"""
+import os
+import re
+import sys
+import json
+import pickle
+import tempfile
+
+GAZETTEER_VERSION = 3
+DEFAULT_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'uk_towns.json')
+# Typeahead never needs more than this many completions per prefix
+SUGGESTION_LIMIT = 10
+RATE_BANDS = ('premium', 'good', 'student', 'budget')
+
+_NORMALISE_RE = re.compile(r"[^a-z0-9]+")
+POSTCODE_AREA_RE = re.compile(r'^([A-Za-z]{1,2})\d')
+
+
+def normalise(name):
+    """'Stoke-on-Trent' / 'stoke on trent' / "St. Albans" -> comparable lookup keys"""
+    name = (name or '').lower().replace('&', ' and ').replace("'", '').replace('.', '')
+    return _NORMALISE_RE.sub(' ', name).strip()
+
+
+def compile_gazetteer(source_path):
+    """Build the lookup tables from the JSON source (plain data so it pickles cleanly)"""
+    with open(source_path, 'r', encoding='utf-8') as f:
+        source = json.load(f)
+
+    tiers = {name: {band: tuple(rates[band]) for band in RATE_BANDS} for name, rates in source['rent_tiers'].items()}
+    default_tier = source.get('default_tier', 'town')
+    towns = []
+    exact = {}
+    aliases = {}
+    areas = {}
+    prefixes = {}
+
+    for idx, entry in enumerate(source['towns']):
+        tier = entry.get('rent_tier', default_tier)
+        if tier not in tiers:
+            raise ValueError(f"{entry['name']}: unknown rent tier {tier!r}")
+        rents = entry.get('rents')
+        towns.append({
+            'name': entry['name'],
+            'slug': entry['slug'],
+            'kind': entry.get('kind', 'town'),
+            'region': entry.get('region'),
+            'aliases': entry.get('aliases', []),
+            'postcode_areas': entry.get('postcode_areas', []),
+            'address_hints': entry.get('address_hints', []),
+            'rent_tier': tier,
+            'rents': {band: tuple(rents[band]) for band in RATE_BANDS} if rents else tiers[tier],
+        })
+
+        # Names and slugs win over aliases ('West Yorkshire' is its own entry, not a Leeds alias)
+        for key in (normalise(entry['name']), normalise(entry['slug'])):
+            exact.setdefault(key, idx)
+        for alias in entry.get('aliases', []):
+            aliases.setdefault(normalise(alias), idx)
+        for area in entry.get('postcode_areas', []):
+            areas.setdefault(area.upper(), idx)
+
+        for key in {normalise(entry['name'])} | {normalise(a) for a in entry.get('aliases', [])}:
+            for end in range(1, len(key) + 1):
+                matches = prefixes.setdefault(key[:end], [])
+                if idx not in matches and len(matches) < SUGGESTION_LIMIT:
+                    matches.append(idx)
+
+    for key, idx in aliases.items():
+        exact.setdefault(key, idx)
+
+    return {'towns': towns, 'exact': exact, 'areas': areas, 'prefixes': prefixes,
+            'tiers': tiers, 'default_tier': default_tier}
+
+
+class Gazetteer:
+    def __init__(self, tables):
+        self.towns = tables['towns']
+        self.exact = tables['exact']
+        self.areas = tables['areas']
+        self.prefixes = tables['prefixes']
+        self.tiers = tables['tiers']
+        self.default_tier = tables['default_tier']
+        self._warned = set()
+
+    def resolve(self, query):
+        """Town entry for a name, alias, slug or postcode, else None"""
+        idx = self.exact.get(normalise(query))
+        if idx is None:
+            match = POSTCODE_AREA_RE.match((query or '').strip())
+            if match:
+                idx = self.areas.get(match.group(1).upper())
+        return self.towns[idx] if idx is not None else None
+
+    def suggest(self, prefix, limit=SUGGESTION_LIMIT):
+        """Town names starting with prefix (or with one of their aliases), in table order"""
+        return [self.towns[idx]['name'] for idx in self.prefixes.get(normalise(prefix), ())[:limit]]
+
+    def slug(self, city):
+        """Portal URL slug for a city; unknown names are slugified as before"""
+        town = self.resolve(city)
+        return town['slug'] if town else city.lower().replace(" ", "-")
+
+    def rent_rates(self, city):
+        """Rent per room bands for a city; unknown cities get the default tier, with a warning"""
+        town = self.resolve(city)
+        if town:
+            return town['rents']
+        if normalise(city) not in self._warned:
+            self._warned.add(normalise(city))
+            print(f"⚠️ {city} not in gazetteer, using default '{self.default_tier}' rent tier", file=sys.stderr)
+        return self.tiers[self.default_tier]
+
+    def city_names(self, kind=None):
+        return [t['name'] for t in self.towns if kind is None or t['kind'] == kind]
+
+
+def _cache_path(source_path):
+    return source_path + '.idx.pickle'
+
+
+def load_gazetteer(source_path):
+    """Load the compiled gazetteer for this source, recompiling if the source changed"""
+    stat = os.stat(source_path)
+    signature = (GAZETTEER_VERSION, stat.st_size, int(stat.st_mtime))
+    cache_path = _cache_path(source_path)
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_signature, tables = pickle.load(f)
+        if cached_signature == signature:
+            return Gazetteer(tables)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        pass
+
+    tables = compile_gazetteer(source_path)
+    tmp_path = None
+    try:
+        # A temp file per writer: processes compiling at once mustn't interleave into one file
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(cache_path) or '.', prefix='.gazetteer-',
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            pickle.dump((signature, tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Couldn't cache compiled gazetteer: {e}", file=sys.stderr)
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    print(f"🗺️ Compiled gazetteer: {len(tables['towns'])} places, {len(tables['prefixes'])} prefixes from {source_path}", file=sys.stderr)
+    return Gazetteer(tables)
+
+
+_default_gazetteer = None
+
+
+def get_gazetteer():
+    """Gazetteer for SCRAPER_GAZETTEER (or server/data/uk_towns.json), loaded once per process"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = load_gazetteer(os.environ.get('SCRAPER_GAZETTEER', DEFAULT_SOURCE_PATH))
+    return _default_gazetteer
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == 'build':
+        gazetteer = get_gazetteer()
+        print(f"✅ {len(gazetteer.towns)} places, {len(gazetteer.prefixes)} prefixes", file=sys.stderr)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'resolve':
+        gazetteer = get_gazetteer()
+        for query in sys.argv[2:]:
+            town = gazetteer.resolve(query)
+            print(f"{query}\t{json.dumps(town, ensure_ascii=False) if town else None}")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'suggest':
+        print(json.dumps(get_gazetteer().suggest(sys.argv[2])))
+    else:
+        print("Usage: python gazetteer.py build\n"
+              "       python gazetteer.py resolve <name|postcode> [...]\n"
+              "       python gazetteer.py suggest <prefix>", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
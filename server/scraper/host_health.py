@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Per-host circuit breaker persisted between scraper processes.
+
+After FAILURE_THRESHOLD consecutive failed requests (403, 429, 5xx, network
+errors) a host's circuit opens and every scraper process skips it until the
+cool-down has passed. The first request after that is a single probe: if it
+succeeds the circuit closes, if it fails the circuit re-opens with a doubled
+cool-down (capped at MAX_COOLDOWN_S).
+
+State is a small JSON file (SCRAPER_HOST_HEALTH_FILE, /tmp in production,
+.local otherwise), updated under an flock so concurrent scrapes agree.
+
+    python3 host_health.py            # show current state
+    python3 host_health.py reset zoopla.co.uk
+"""
+import os
+import sys
+import json
+import time
+import fcntl
+
+FAILURE_THRESHOLD = int(os.environ.get('SCRAPER_BREAKER_THRESHOLD', '3'))
+COOLDOWN_S = float(os.environ.get('SCRAPER_BREAKER_COOLDOWN', '900'))
+MAX_COOLDOWN_S = 6 * 3600
+# A probe that never reported back (process killed) stops blocking other probes after this long
+PROBE_TIMEOUT_S = 120
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+def default_health_path():
+    configured = os.environ.get('SCRAPER_HOST_HEALTH_FILE')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/host_health.json'
+    return os.path.join('.local', 'host_health.json')
+
+
+def host_of(url):
+    """'https://www.zoopla.co.uk/for-sale/...' -> 'zoopla.co.uk'"""
+    host = url.split('://', 1)[-1].split('/', 1)[0].split(':', 1)[0].lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class HostHealth:
+    """Circuit breaker per host. With path=None state is kept in memory only (replay runs)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.hosts = {}
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.hosts = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update(self, host, change):
+        """Apply change(state) to the freshest on-disk state for host, under the lock"""
+        if not self.path:
+            state = self.hosts.setdefault(host, {'state': CLOSED, 'failures': 0})
+            change(state)
+            return state
+
+        with open(self.path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.hosts = self._read()
+            state = self.hosts.setdefault(host, {'state': CLOSED, 'failures': 0})
+            change(state)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.hosts, f, indent=2)
+            os.replace(tmp_path, self.path)
+        return state
+
+    def allow_request(self, url):
+        """'closed' to fetch normally, 'probe' for a single trial request, None to skip the host"""
+        host = host_of(url)
+        state = self.hosts.get(host)
+        if not state or state['state'] == CLOSED:
+            return CLOSED
+
+        now = time.time()
+        if state['state'] == OPEN and now - state.get('opened_at', 0) < state.get('cooldown', COOLDOWN_S):
+            return None
+        if state['state'] == HALF_OPEN and now - state.get('probe_at', 0) < PROBE_TIMEOUT_S:
+            return None  # someone else is probing
+
+        decision = {}
+
+        def claim_probe(s):
+            # Re-check against fresh state: another process may have claimed the probe already
+            if s['state'] == OPEN and now - s.get('opened_at', 0) >= s.get('cooldown', COOLDOWN_S) or \
+               s['state'] == HALF_OPEN and now - s.get('probe_at', 0) >= PROBE_TIMEOUT_S:
+                s['state'] = HALF_OPEN
+                s['probe_at'] = now
+                decision['probe'] = True
+            elif s['state'] == CLOSED:
+                decision['closed'] = True
+
+        self._update(host, claim_probe)
+        if decision.get('probe'):
+            print(f"🩺 Circuit for {host} half-open, sending a single probe request", file=sys.stderr)
+            return 'probe'
+        return CLOSED if decision.get('closed') else None
+
+    def is_open(self, url):
+        state = self.hosts.get(host_of(url))
+        return bool(state) and state['state'] == OPEN
+
+    def record_success(self, url):
+        host = host_of(url)
+        state = self.hosts.get(host)
+        if not state or (state['state'] == CLOSED and state.get('failures', 0) == 0):
+            return  # healthy host - nothing to persist
+
+        def close(s):
+            if s['state'] != CLOSED:
+                print(f"✅ Circuit for {host} closed again", file=sys.stderr)
+            s.update(state=CLOSED, failures=0)
+            s.pop('opened_at', None)
+            s.pop('probe_at', None)
+            s.pop('cooldown', None)
+
+        self._update(host, close)
+
+    def record_failure(self, url, reason=''):
+        host = host_of(url)
+
+        def fail(s):
+            s['failures'] = s.get('failures', 0) + 1
+            s['last_failure'] = reason
+            if s['state'] == HALF_OPEN:
+                s['cooldown'] = min(MAX_COOLDOWN_S, s.get('cooldown', COOLDOWN_S) * 2)
+                s.update(state=OPEN, opened_at=time.time())
+                print(f"🔌 Probe to {host} failed ({reason}), circuit open for {int(s['cooldown'])}s", file=sys.stderr)
+            elif s['state'] == CLOSED and s['failures'] >= FAILURE_THRESHOLD:
+                s.update(state=OPEN, opened_at=time.time(), cooldown=COOLDOWN_S)
+                print(f"🔌 {s['failures']} consecutive failures from {host} ({reason}), circuit open for {int(COOLDOWN_S)}s", file=sys.stderr)
+
+        self._update(host, fail)
+
+
+def main():
+    health = HostHealth(default_health_path())
+    if len(sys.argv) == 3 and sys.argv[1] == 'reset':
+        health._update(host_of(sys.argv[2]), lambda s: (s.clear(), s.update(state=CLOSED, failures=0)))
+        print(f"✅ Reset circuit for {host_of(sys.argv[2])}", file=sys.stderr)
+    print(json.dumps(health.hosts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
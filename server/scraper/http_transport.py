@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Record/replay transport adapters for the scraper's requests session.
+
+A recording run stores every request/response pair (status, headers, body,
+or the network error raised) in a zip archive. A replay run serves the same
+responses from that archive with no network access, so the whole
+scrape_properties_with_requests pipeline - retries and fallback tiers
+included - can be reproduced and profiled offline. A portal redirect sends
+every request to a local stand-in portal (mock_portal.py) for load testing.
+
+Archive layout:
+    index.jsonl      one JSON line per exchange, in the order they happened
+    bodies/<sha1>    response bodies, deflated and stored once per distinct body
+"""
+import sys
+import json
+import hashlib
+import zipfile
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Bodies are stored decoded, so these would describe the wrong bytes on replay
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+REPLAYABLE_ERRORS = {
+    'ConnectionError': requests.exceptions.ConnectionError,
+    'ConnectTimeout': requests.exceptions.ConnectTimeout,
+    'ReadTimeout': requests.exceptions.ReadTimeout,
+    'Timeout': requests.exceptions.Timeout,
+    'SSLError': requests.exceptions.SSLError,
+    'TooManyRedirects': requests.exceptions.TooManyRedirects,
+}
+
+
+class HttpArchive:
+    """In-memory list of recorded exchanges plus their de-duplicated bodies"""
+
+    def __init__(self):
+        self.entries = []
+        self.bodies = {}
+
+    def add_response(self, method, url, response):
+        body = response.content or b''
+        digest = hashlib.sha1(body).hexdigest()
+        self.bodies.setdefault(digest, body)
+        self.entries.append({
+            'method': method,
+            'url': url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'final_url': response.url,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            'body': digest,
+        })
+
+    def add_error(self, method, url, error):
+        self.entries.append({
+            'method': method,
+            'url': url,
+            'error': type(error).__name__,
+            'message': str(error),
+        })
+
+    def save(self, path):
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('index.jsonl', ''.join(json.dumps(e) + '\n' for e in self.entries))
+            for digest, body in self.bodies.items():
+                zf.writestr(f'bodies/{digest}', body)
+        print(f"📼 Saved HTTP archive: {len(self.entries)} exchanges, {len(self.bodies)} distinct bodies -> {path}", file=sys.stderr)
+
+    @classmethod
+    def load(cls, path):
+        archive = cls()
+        with zipfile.ZipFile(path, 'r') as zf:
+            for line in zf.read('index.jsonl').decode('utf-8').splitlines():
+                if line.strip():
+                    archive.entries.append(json.loads(line))
+            for name in zf.namelist():
+                if name.startswith('bodies/'):
+                    archive.bodies[name[len('bodies/'):]] = zf.read(name)
+        return archive
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Real HTTP transport that also writes every exchange into an HttpArchive"""
+
+    def __init__(self, archive, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        try:
+            response = super().send(request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.archive.add_error(request.method, request.url, e)
+            raise
+        self.archive.add_response(request.method, request.url, response)
+        return response
+
+
+class RequestBudgetExhausted(Exception):
+    """Raised instead of sending once a CountingAdapter's limit is reached.
+
+    Deliberately not a RequestException: it isn't a network failure, so retry
+    loops and the circuit breaker must not treat it as one.
+    """
+
+
+class CountingAdapter(HTTPAdapter):
+    """Real HTTP transport that counts the requests it sends and stops at an optional limit (refresh budgets)"""
+
+    def __init__(self, *args, limit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests_sent = 0
+        self.limit = limit
+        self.refused = 0  # requests not sent because the limit was reached
+
+    def send(self, request, **kwargs):
+        if self.limit is not None and self.requests_sent >= self.limit:
+            self.refused += 1
+            raise RequestBudgetExhausted(f"request budget of {self.limit} spent")
+        self.requests_sent += 1
+        return super().send(request, **kwargs)
+
+
+class PortalRedirectAdapter(HTTPAdapter):
+    """Real HTTP transport that sends every request to one base URL (mock_portal.py).
+
+    The original host travels in X-Portal-Host so the stand-in can answer as
+    Zoopla or PrimeLocation; everything above the adapter (host health, URL
+    resolution, logging) still sees the real portal URLs.
+    """
+
+    def __init__(self, base_url, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        host, _, path = request.url.partition('://')[2].partition('/')
+        request.headers['X-Portal-Host'] = host
+        request.url = f"{self.base_url}/{path}"
+        return super().send(request, **kwargs)
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves recorded exchanges back in order, per (method, url).
+
+    Repeated requests for the same URL get the recorded responses in the
+    order they were recorded (so a 403 -> 403 -> 200 retry sequence replays
+    faithfully); once they run out the last one is repeated.
+    """
+
+    def __init__(self, archive):
+        super().__init__()
+        self.archive = archive
+        self._queues = defaultdict(deque)
+        self._last = {}
+        for entry in archive.entries:
+            self._queues[(entry['method'], entry['url'])].append(entry)
+
+    def send(self, request, **kwargs):
+        key = (request.method, request.url)
+        queue = self._queues.get(key)
+        if queue:
+            entry = queue.popleft()
+            self._last[key] = entry
+        elif key in self._last:
+            entry = self._last[key]
+        else:
+            raise requests.exceptions.ConnectionError(f"No recorded response for {request.method} {request.url}", request=request)
+
+        if 'error' in entry:
+            error_cls = REPLAYABLE_ERRORS.get(entry['error'], requests.exceptions.ConnectionError)
+            raise error_cls(entry.get('message', ''), request=request)
+
+        return self._build_response(request, entry)
+
+    def _build_response(self, request, entry):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.get('final_url') or request.url
+        response.request = request
+        response.connection = self
+        response._content = self.archive.bodies.get(entry.get('body'), b'')
+        return response
+
+    def close(self):
+        pass
+
+
+def build_transport(record_path=None, replay_path=None, portal_url=None):
+    """Return (adapter, archive) for the requested mode, or (None, None) for plain network access"""
+    if portal_url:
+        print(f"🧪 Sending all portal requests to {portal_url}", file=sys.stderr)
+        return PortalRedirectAdapter(portal_url), None
+    if replay_path:
+        archive = HttpArchive.load(replay_path)
+        print(f"📼 Replaying {len(archive.entries)} recorded exchanges from {replay_path}", file=sys.stderr)
+        return ReplayAdapter(archive), archive
+    if record_path:
+        archive = HttpArchive()
+        return RecordingAdapter(archive), archive
+    return None, None
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Drive many concurrent prime_scraper.py searches against the stand-in portal.
+
+Starts mock_portal.py in-process (or uses --portal-url), spawns scraper
+processes exactly the way ScrapingService does, and reports throughput,
+per-search latency percentiles, peak RSS and CPU per search (from os.wait4)
+plus the portal's request counts. Journals, price history, the warm cache and
+rent sketches go to a throwaway directory so the real state is never touched.
+
+    python3 load_harness.py --searches 40 --concurrency 8
+    python3 load_harness.py --searches 20 --concurrency 4 --rate-403 0.1 --latency-ms 800
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from mock_portal import add_portal_arguments, server_from_args
+from prime_scraper import default_parse_workers
+
+SCRAPER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prime_scraper.py')
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(SCRAPER_PATH), '..', '..'))
+DEFAULT_CITIES = ('Leeds', 'Manchester', 'Liverpool', 'Birmingham', 'Sheffield', 'Nottingham', 'Bristol', 'Newcastle')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_search(job, portal_url, env, timeout):
+    """Run one scraper process; returns its latency, exit code, listing count and rusage"""
+    city, min_bedrooms, max_price, keywords = job
+    cmd = [sys.executable, SCRAPER_PATH, city, str(min_bedrooms), str(max_price), keywords,
+           '--portal-url', portal_url, '--fresh']
+    started = time.monotonic()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=REPO_ROOT, env=env)
+    killer = threading.Timer(timeout, proc.kill)
+    killer.start()
+    try:
+        output = proc.stdout.read()
+        proc.stdout.close()
+        # wait4 instead of proc.wait() to get the child's own peak RSS and CPU time
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    finally:
+        killer.cancel()
+    latency = time.monotonic() - started
+
+    try:
+        listings = len(json.loads(output)) if proc.returncode == 0 else 0
+    except ValueError:
+        listings = 0
+    return {
+        'city': city,
+        'latency_s': latency,
+        'exit_code': proc.returncode,
+        'listings': listings,
+        'peak_rss_mb': usage.ru_maxrss / 1024,  # KiB on Linux
+        'cpu_s': usage.ru_utime + usage.ru_stime,
+    }
+
+
+def summarise(results, wall_s, portal_stats):
+    ok = [r for r in results if r['exit_code'] == 0]
+    latencies = [r['latency_s'] for r in ok] or [0.0]
+    rss = [r['peak_rss_mb'] for r in results] or [0.0]
+    listings = sum(r['listings'] for r in ok)
+    return {
+        'searches': len(results),
+        'failed': len(results) - len(ok),
+        'wall_s': round(wall_s, 2),
+        'searches_per_s': round(len(ok) / wall_s, 3) if wall_s else None,
+        'listings': listings,
+        'listings_per_s': round(listings / wall_s, 1) if wall_s else None,
+        'latency_s': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p90': round(percentile(latencies, 90), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(max(latencies), 2),
+        },
+        'peak_rss_mb': {'p50': round(percentile(rss, 50), 1), 'max': round(max(rss), 1)},
+        'cpu_s_per_search': round(sum(r['cpu_s'] for r in results) / len(results), 2) if results else 0,
+        'portal_requests': portal_stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent scraper load test against a stand-in portal")
+    parser.add_argument('--searches', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--cities', default=','.join(DEFAULT_CITIES), help="Comma-separated, used round-robin")
+    parser.add_argument('--min-bedrooms', type=int, default=4)
+    parser.add_argument('--max-price', type=int, default=300000)
+    parser.add_argument('--keywords', default='HMO')
+    parser.add_argument('--portal-url', default=None, help="Use an already running mock portal")
+    parser.add_argument('--delay-scale', default='0', help="SCRAPER_DELAY_SCALE for the scrapers (0 = no polite sleeps)")
+    # At least 2 so the default run goes through the parse pool even on a single-core host
+    parser.add_argument('--parse-workers', default=str(max(2, default_parse_workers())),
+                        help="SCRAPER_PARSE_WORKERS for each scraper (default: the scraper's own, at least 2)")
+    parser.add_argument('--timeout', type=float, default=180, help="Kill a search after this many seconds")
+    parser.add_argument('--keep-state', action='store_true', help="Keep the throwaway state directory")
+    add_portal_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    portal_url = args.portal_url
+    if not portal_url:
+        server = server_from_args(args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        portal_url = 'http://%s:%d' % server.server_address[:2]
+        print(f"🧪 Mock portal on {portal_url}", file=sys.stderr)
+
+    state_dir = tempfile.mkdtemp(prefix='scraper_load_')
+    env = dict(os.environ,
+               PYTHONPATH=REPO_ROOT,
+               SCRAPER_DELAY_SCALE=args.delay_scale,
+               SCRAPER_PARSE_WORKERS=args.parse_workers,
+               SCRAPER_JOURNAL_DIR=os.path.join(state_dir, 'journal'),
+               SCRAPER_HISTORY_DIR=os.path.join(state_dir, 'history'),
+               SCRAPER_WARM_CACHE_DIR=os.path.join(state_dir, 'warm'),
+               SCRAPER_RENT_SKETCHES=os.path.join(state_dir, 'rent_sketches.json'))
+
+    cities = [c.strip() for c in args.cities.split(',') if c.strip()]
+    jobs = [(cities[i % len(cities)], args.min_bedrooms, args.max_price, args.keywords) for i in range(args.searches)]
+    print(f"🚀 {len(jobs)} searches, {args.concurrency} at a time", file=sys.stderr)
+
+    started = time.monotonic()
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for result in pool.map(lambda job: run_search(job, portal_url, env, args.timeout), jobs):
+                results.append(result)
+                mark = '✅' if result['exit_code'] == 0 else '❌'
+                print(f"{mark} {result['city']}: {result['listings']} listings in {result['latency_s']:.2f}s, "
+                      f"{result['peak_rss_mb']:.0f} MB", file=sys.stderr)
+        wall_s = time.monotonic() - started
+
+        if server:
+            with server.stats_lock:
+                portal_stats = dict(server.stats)
+        else:
+            try:
+                portal_stats = requests.get(portal_url.rstrip('/') + '/__stats', timeout=10).json()
+            except (requests.exceptions.RequestException, ValueError):
+                portal_stats = None
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        if args.keep_state:
+            print(f"📁 Scraper state kept in {state_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    report = summarise(results, wall_s, portal_stats)
+    print(f"📊 {report['searches_per_s']} searches/s, {report['listings_per_s']} listings/s, "
+          f"p50 {report['latency_s']['p50']}s / p90 {report['latency_s']['p90']}s / p99 {report['latency_s']['p99']}s, "
+          f"peak RSS max {report['peak_rss_mb']['max']} MB, {report['failed']} failed", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Local stand-in for Zoopla and PrimeLocation, for load testing the scraper.
+
+Serves sale and to-rent search result pages and listing detail pages shaped
+like the real portals' markup, from a deterministic listing pool per city (both portals
+share listing ids, as the real ones do). Latency, 403/429 rates, listings per
+page and page padding are configurable. Point the scraper at it with
+--portal-url / SCRAPER_PORTAL_URL; the original host arrives in the
+X-Portal-Host header. GET /__stats returns request counts per portal and status.
+
+    python3 mock_portal.py --port 8765 --latency-ms 300 --rate-403 0.05
+    python3 prime_scraper.py Leeds 4 300000 HMO --portal-url http://127.0.0.1:8765
+"""
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from gazetteer import get_gazetteer
+
+STREETS = ('Briggate', 'Hyde Park Road', 'Victoria Street', 'Chapel Lane', 'Station Road', 'Church Street',
+           'Queens Road', 'Mill Lane', 'Park Avenue', 'Grove Terrace', 'Albert Road', 'High Street')
+PROPERTY_TYPES = ('terraced house', 'semi-detached house', 'end of terrace house', 'detached house', 'flat')
+
+
+@lru_cache(maxsize=256)
+def listing_pool(slug, size, variant=''):
+    """Deterministic listings for a city slug: (id, beds, baths, price, address, property type)"""
+    rng = random.Random(slug + variant)
+    town = get_gazetteer().resolve(slug)
+    city = town['name'] if town else slug.replace('-', ' ').title()
+    area = town['postcode_areas'][0] if town and town['postcode_areas'] else 'ZZ'
+    base_id = 60000000 + zlib.crc32((slug + variant).encode('utf-8')) % 9000 * 1000
+    pool = []
+    for i in range(size):
+        beds = rng.randint(1, 8)
+        postcode = f"{area}{rng.randint(1, 20)} {rng.randint(1, 9)}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}{rng.choice('ABDEFGHJLNPQRSTUWXYZ')}"
+        pool.append((base_id + i, beds, max(1, beds // 2), rng.randrange(60000, 900000, 2500),
+                     f"{rng.randint(1, 250)} {rng.choice(STREETS)}, {city} {postcode}", rng.choice(PROPERTY_TYPES)))
+    return pool
+
+
+def _first_int(query, name, default):
+    try:
+        return int(float(query.get(name, [default])[0]))
+    except (TypeError, ValueError):
+        return default
+
+
+def zoopla_card(listing):
+    listing_id, beds, baths, price, address, kind = listing
+    return (f'<div id="listing_{listing_id}" data-testid="listing-card-content">'
+            f'<a href="/for-sale/details/{listing_id}/" data-testid="listing-details-link">'
+            f'<h2 data-testid="listing-title">{beds} bed {kind} for sale</h2><address>{address}</address></a>'
+            f'<p data-testid="listing-price">£{price:,}</p>'
+            f'<ul><li data-testid="beds">{beds} beds</li><li data-testid="baths">{baths} baths</li></ul>'
+            f'<img src="https://lid.zoocdn.com/645/430/{listing_id:x}.jpg" alt=""></div>')
+
+
+def primelocation_card(listing):
+    listing_id, beds, baths, price, address, kind = listing
+    return (f'<article data-testid="search-result-{listing_id}">'
+            f'<a href="/for-sale/details/{listing_id}/"><h2>{address}</h2></a>'
+            f'<p class="price">£{price:,}</p><span class="num-beds">{beds} bedrooms</span>'
+            f'<span class="num-baths">{baths} bathrooms</span><p>{beds} bed {kind}</p>'
+            f'<img src="https://lc.zoocdn.com/645/430/{listing_id:x}.jpg" alt=""></article>')
+
+
+def rent_card(listing, rent_per_room, room):
+    """To-rent card: a room let, or the whole property at beds × rent per room"""
+    listing_id, beds, _, _, address, kind = listing
+    title, rent = ('Double room to rent', rent_per_room) if room else (f'{beds} bed {kind} to rent', rent_per_room * beds)
+    return (f'<div id="listing_{listing_id}" data-testid="listing-card-content">'
+            f'<a href="/to-rent/details/{listing_id}/" data-testid="listing-details-link">'
+            f'<h2 data-testid="listing-title">{title}</h2><address>{address}</address></a>'
+            f'<p data-testid="listing-price">£{rent:,} pcm</p></div>')
+
+
+class MockPortalHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real portals
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=()):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        portal = (self.headers.get('X-Portal-Host') or self.headers.get('Host') or '').lower()
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            with server.stats_lock:
+                return self._send(200, json.dumps(server.stats), 'application/json')
+
+        delay = server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)
+        time.sleep(max(0.0, delay) / 1000)
+
+        roll = random.random()
+        if roll < server.rate_403:
+            status, body, headers = 403, '<html><body><h1>Access denied</h1></body></html>', ()
+        elif roll < server.rate_403 + server.rate_429:
+            status, body, headers = 429, '<html><body>Too many requests</body></html>', (('Retry-After', '30'),)
+        else:
+            status, body, headers = self._page(portal, url)
+
+        with server.stats_lock:
+            key = f"{'primelocation' if 'primelocation' in portal else 'zoopla'} {status}"
+            server.stats[key] = server.stats.get(key, 0) + 1
+        self._send(status, body, headers=headers)
+
+    def _page(self, portal, url):
+        parts = [p for p in url.path.split('/') if p]
+        server = self.server
+        if len(parts) >= 3 and parts[:2] == ['for-sale', 'details']:
+            return self._details_page(parts[2])
+        if len(parts) < 3 or parts[0] not in ('for-sale', 'to-rent'):
+            return 404, '<html><body>Not found</body></html>', ()
+
+        query = parse_qs(url.query)
+        beds_min = _first_int(query, 'beds_min', 0)
+        price_max = _first_int(query, 'price_max', 10 ** 9)
+        page = max(1, _first_int(query, 'pn', 1))
+        if parts[0] == 'to-rent':
+            # Rents spread over the city's rent table, fixed per listing. The table's
+            # figures sit at weekly levels; portals quote per calendar month
+            rates = get_gazetteer().rent_rates(parts[2])
+            room = query.get('is_shared_accommodation') == ['true']
+            # Room lets are their own listings, whole-property lets reuse the sale pool
+            pool = listing_pool(parts[2], server.pool_size, 'rooms' if room else '')
+            matches = [l for l in pool if l[1] >= beds_min]
+
+            def card(l):
+                rent = random.Random(l[0]).randrange(rates['budget'][0], rates['premium'][1] + 1) * 52 // 12
+                return rent_card(l, rent, room)
+        else:
+            matches = [l for l in listing_pool(parts[2], server.pool_size) if l[1] >= beds_min and l[3] <= price_max]
+            card = primelocation_card if 'primelocation' in portal else zoopla_card
+        shown = matches[(page - 1) * server.page_size:page * server.page_size]
+
+        padding = f'<script id="__NEXT_DATA__" type="application/json">{{"pad":"{"x" * server.padding_bytes}"}}</script>' if server.padding_bytes else ''
+        body = (f'<!DOCTYPE html><html><head><title>Property {"to rent" if parts[0] == "to-rent" else "for sale"} in {parts[2]}</title></head><body>'
+                f'<header><nav><a href="/">Home</a></nav></header>'
+                f'<main><p>{len(matches)} results</p><div data-testid="regular-listings">'
+                + ''.join(card(l) for l in shown) +
+                f'</div></main><footer>Stand-in portal</footer>{padding}</body></html>')
+        return 200, body, ()
+
+    def _details_page(self, raw_id):
+        try:
+            listing_id = int(raw_id)
+        except ValueError:
+            return 404, '<html><body>Not found</body></html>', ()
+        # Any pool could own the id - a detail page only needs to look plausible
+        rng = random.Random(listing_id)
+        beds = rng.randint(1, 8)
+        body = (f'<!DOCTYPE html><html><body><h1>{beds} bed house for sale</h1>'
+                f'<p data-testid="price">£{rng.randrange(60000, 900000, 2500):,}</p>'
+                f'<div data-testid="listing_description"><p>A {beds} bedroom property currently let as an HMO, '
+                f'close to local amenities and transport links.</p></div>'
+                f'<ul><li>{beds} bedrooms</li><li>{max(1, beds // 2)} bathrooms</li><li>{rng.randint(60, 220)} sq. m</li></ul>'
+                f'</body></html>')
+        return 200, body, ()
+
+
+def create_server(host='127.0.0.1', port=0, latency_ms=200.0, jitter_ms=50.0, rate_403=0.0, rate_429=0.0,
+                  page_size=25, pool_size=400, padding_kb=0):
+    """ThreadingHTTPServer bound to (host, port); port 0 picks a free one (see server.server_address)"""
+    server = ThreadingHTTPServer((host, port), MockPortalHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.jitter_ms = min(jitter_ms, latency_ms)
+    server.rate_403 = rate_403
+    server.rate_429 = rate_429
+    server.page_size = page_size
+    server.pool_size = pool_size
+    server.padding_bytes = int(padding_kb * 1024)
+    server.stats = {}
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def add_portal_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=200, help="Mean response latency")
+    parser.add_argument('--jitter-ms', type=float, default=50, help="Uniform latency jitter (±)")
+    parser.add_argument('--rate-403', type=float, default=0.0, help="Fraction of requests answered 403")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument('--page-size', type=int, default=25, help="Listings per search results page")
+    parser.add_argument('--pool-size', type=int, default=400, help="Listings per city")
+    parser.add_argument('--padding-kb', type=float, default=0, help="Extra inline JSON per page, like real portal pages")
+
+
+def server_from_args(args, host='127.0.0.1', port=0):
+    return create_server(host, port, args.latency_ms, args.jitter_ms, args.rate_403, args.rate_429,
+                         args.page_size, args.pool_size, args.padding_kb)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Zoopla/PrimeLocation server for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_portal_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"🧪 Mock portal on http://{host}:{port} (latency {server.latency_ms}±{server.jitter_ms}ms, "
+          f"403 {args.rate_403:.0%}, 429 {args.rate_429:.0%}, {args.page_size} per page)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
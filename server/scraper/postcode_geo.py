@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Offline UK postcode geocoding from a memory-mapped, sorted binary table.
+
+The table is compiled once from a locally supplied postcode-centroid CSV
+(e.g. the ONS postcode directory or ukpostcodes.csv):
+
+    python3 postcode_geo.py compile ukpostcodes.csv ../data/postcodes.bin
+
+Besides every full postcode it stores the centroid of each sector ("LS9 8")
+and district ("LS9"), so partial postcodes scraped from addresses like
+"160 Briggate, Leeds LS9" still resolve; `locate` says which level matched.
+Lookups binary-search the mmapped file, so startup is instant and only the
+touched pages become resident.
+
+File layout (little-endian):
+    header   8s magic, uint32 record count, uint32 reserved
+    records  8s key (upper-case, single space, NUL padded), float32 lat, float32 lon
+"""
+import os
+import sys
+import csv
+import mmap
+import struct
+import re
+
+MAGIC = b'PCGEO1\0\0'
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<8sff')
+KEY_SIZE = 8
+
+FULL_POSTCODE_RE = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?)\s*(\d[A-Z]{2})\b')
+# Outward code on its own is only trusted at the end of an address ("..., Leeds LS9")
+OUTWARD_RE = re.compile(r'\b([A-Z]{1,2}\d[A-Z\d]?)\s*$')
+
+# How precisely a lookup located a postcode, in postcode_keys order
+RESOLUTIONS = ('unit', 'sector', 'district')
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'postcodes.bin')
+
+
+def normalise_postcode(postcode):
+    """'ls98ab' / 'LS9  8AB' -> 'LS9 8AB'; outward-only codes are returned unchanged"""
+    compact = re.sub(r'\s+', '', postcode or '').upper()
+    if len(compact) >= 5 and compact[-3].isdigit():
+        return f"{compact[:-3]} {compact[-3:]}"
+    return compact
+
+
+def extract_postcode(address):
+    """Full postcode if the address has one, else a trailing outward code, else None"""
+    if not address:
+        return None
+    text = address.upper()
+    match = FULL_POSTCODE_RE.search(text)
+    if match:
+        return f"{match.group(1)} {match.group(2)}"
+    match = OUTWARD_RE.search(text.rstrip(' ,.'))
+    if match:
+        return match.group(1)
+    return None
+
+
+def postcode_keys(postcode):
+    """Lookup keys from most to least specific: full, sector, district"""
+    postcode = normalise_postcode(postcode)
+    if ' ' not in postcode:
+        return [postcode]
+    outward, inward = postcode.split(' ', 1)
+    return [postcode, f"{outward} {inward[0]}", outward]
+
+
+def _pack_key(key):
+    return key.encode('ascii', 'ignore')[:KEY_SIZE].ljust(KEY_SIZE, b'\0')
+
+
+class PostcodeTable:
+    """Read-only view over a compiled postcode table"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compiled postcode table")
+
+    def _key_at(self, i):
+        offset = HEADER.size + i * RECORD.size
+        return self._mm[offset:offset + KEY_SIZE]
+
+    def _coords_at(self, i):
+        _, lat, lon = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+        return round(lat, 6), round(lon, 6)
+
+    def _lower_bound(self, packed):
+        """Index of the first record whose key is >= packed"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < packed:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, key):
+        packed = _pack_key(key)
+        i = self._lower_bound(packed)
+        if i < self.count and self._key_at(i) == packed:
+            return self._coords_at(i)
+        return None
+
+    def locate(self, postcode):
+        """(latitude, longitude, resolution) for a full or partial postcode, or None
+
+        resolution is the most specific level the table knew (see RESOLUTIONS):
+        an unknown full postcode falls back to its sector's, then its district's centroid.
+        """
+        if not postcode:
+            return None
+        keys = postcode_keys(postcode)
+        for key, resolution in zip(keys, RESOLUTIONS[-len(keys):]):
+            coords = self._find(key)
+            if coords:
+                return coords[0], coords[1], resolution
+        return None
+
+    def lookup(self, postcode):
+        """(latitude, longitude) for a full or partial postcode, or None"""
+        located = self.locate(postcode)
+        return located[:2] if located else None
+
+    def sector_points(self, sector):
+        """(latitude, longitude) of every full postcode in a sector ("LS9 8")"""
+        prefix = _pack_key(sector).rstrip(b'\0')
+        points = []
+        i = self._lower_bound(_pack_key(sector))
+        while i < self.count and self._key_at(i).startswith(prefix):
+            if len(self._key_at(i).rstrip(b'\0')) > len(prefix):
+                points.append(self._coords_at(i))
+            i += 1
+        return points
+
+    def close(self):
+        if self._mm:
+            self._mm.close()
+            self._mm = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+_default_table = None
+_default_table_loaded = False
+
+
+def get_default_table():
+    """Shared table from SCRAPER_POSTCODE_TABLE (or server/data/postcodes.bin); None if not supplied"""
+    global _default_table, _default_table_loaded
+    if not _default_table_loaded:
+        _default_table_loaded = True
+        path = os.environ.get('SCRAPER_POSTCODE_TABLE', DEFAULT_TABLE_PATH)
+        if os.path.exists(path):
+            try:
+                _default_table = PostcodeTable(path)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Postcode table unavailable ({e}), skipping geocoding", file=sys.stderr)
+    return _default_table
+
+
+def geocode_address(address, table=None):
+    """Return (postcode, latitude, longitude, resolution); all but postcode are None when unresolved"""
+    postcode = extract_postcode(address)
+    if not postcode:
+        return None, None, None, None
+    table = table or get_default_table()
+    located = table.locate(postcode) if table else None
+    if not located:
+        return postcode, None, None, None
+    return (postcode,) + located
+
+
+def _find_column(header, candidates):
+    lowered = [h.strip().lower() for h in header]
+    for name in candidates:
+        if name in lowered:
+            return lowered.index(name)
+    raise ValueError(f"CSV needs one of the columns: {', '.join(candidates)}")
+
+
+def compile_table(csv_path, out_path):
+    """Build the sorted binary table (full postcodes + sector and district centroids)"""
+    points = {}
+    aggregates = {}
+
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        pc_col = _find_column(header, ['postcode', 'pcds', 'pcd'])
+        lat_col = _find_column(header, ['latitude', 'lat'])
+        lon_col = _find_column(header, ['longitude', 'long', 'lon', 'lng'])
+
+        for row in reader:
+            try:
+                lat = float(row[lat_col])
+                lon = float(row[lon_col])
+            except (ValueError, IndexError):
+                continue
+            # ONS marks postcodes without a grid reference with 99.999999
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                continue
+            postcode = normalise_postcode(row[pc_col])
+            if ' ' not in postcode or len(postcode) > KEY_SIZE:
+                continue
+            points[postcode] = (lat, lon)
+            for key in postcode_keys(postcode)[1:]:
+                sums = aggregates.setdefault(key, [0.0, 0.0, 0])
+                sums[0] += lat
+                sums[1] += lon
+                sums[2] += 1
+
+    for key, (lat_sum, lon_sum, n) in aggregates.items():
+        points.setdefault(key, (lat_sum / n, lon_sum / n))
+
+    records = sorted((_pack_key(key), lat, lon) for key, (lat, lon) in points.items())
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, len(records), 0))
+        for record in records:
+            out.write(RECORD.pack(*record))
+    os.replace(tmp_path, out_path)
+
+    print(f"🗺️ Compiled {len(records)} postcode records ({len(aggregates)} sectors/districts) -> {out_path}", file=sys.stderr)
+    return len(records)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == 'compile':
+        compile_table(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'lookup':
+        table = get_default_table()
+        if not table:
+            print("❌ No postcode table found (set SCRAPER_POSTCODE_TABLE)", file=sys.stderr)
+            sys.exit(1)
+        for postcode in sys.argv[2:]:
+            print(f"{normalise_postcode(postcode)}\t{table.lookup(postcode)}")
+    else:
+        print("Usage: python postcode_geo.py compile <postcodes.csv> <out.bin>\n"
+              "       python postcode_geo.py lookup <postcode> [...]", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
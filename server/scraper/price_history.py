@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Append-only price history for scraped listings, with incremental price-drop / new-listing events.
+
+Everything is fixed-width binary records in a directory (SCRAPER_HISTORY_DIR,
+/tmp in production, .local otherwise):
+
+    observations.bin  (listing key, timestamp, price, city id) per listing per run
+    latest.bin        last known state per listing - the only thing a run reads
+    events.bin        new / drop / rise events, appended in time order
+    cities.json       dictionary encoding of city names to small ints
+    listings.jsonl    listing key -> url/address, written when a listing is first seen
+
+A run compares each listing with latest.bin only, so emitting events never
+rescans the observation history. Because events.bin is time-ordered, "drops
+in the last 7 days" binary-searches the cutoff and reads only the tail:
+
+    python3 price_history.py drops --city Leeds --days 7
+    python3 price_history.py events --kind new --days 1
+"""
+import os
+import sys
+import re
+import json
+import time
+import mmap
+import fcntl
+import struct
+import hashlib
+import argparse
+
+OBSERVATION = struct.Struct('<QIIH')   # key, ts, price, city
+LATEST = struct.Struct('<QIIIH')       # key, first_seen, last_seen, last_price, city
+EVENT = struct.Struct('<IBHQII')       # ts, kind, city, key, old_price, new_price
+
+EVENT_NEW, EVENT_DROP, EVENT_RISE = 1, 2, 3
+EVENT_NAMES = {EVENT_NEW: 'new', EVENT_DROP: 'drop', EVENT_RISE: 'rise'}
+
+PORTAL_CODES = {'zoopla': 1, 'primelocation': 2, 'rightmove': 3}
+DETAILS_ID_RE = re.compile(r'/details/(\d+)')
+
+
+def default_history_dir():
+    configured = os.environ.get('SCRAPER_HISTORY_DIR')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/price_history'
+    return os.path.join('.local', 'price_history')
+
+
+def listing_key(listing):
+    """Stable 64-bit id: portal code + the portal's numeric listing id, else a hash of the address/URL
+
+    Without a /details/ id the address is hashed, not the URL: cards with no
+    link of their own carry the search page URL, which every such card shares.
+    """
+    url = listing.get('property_url') or ''
+    match = DETAILS_ID_RE.search(url)
+    if match:
+        portal = next((code for name, code in PORTAL_CODES.items() if name in url), 0)
+        return (portal << 56) | (int(match.group(1)) & ((1 << 56) - 1))
+    basis = (listing.get('address') or url).lower().encode('utf-8')
+    # Top byte 0xFF keeps hashed keys apart from portal ids
+    return (0xFF << 56) | int.from_bytes(hashlib.blake2b(basis, digest_size=7).digest(), 'big')
+
+
+class PriceHistory:
+    def __init__(self, directory=None):
+        self.dir = directory or default_history_dir()
+        os.makedirs(self.dir, exist_ok=True)
+        self.cities = self._load_json('cities.json', {})
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _load_json(self, name, default):
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def city_id(self, city):
+        name = (city or '').strip().lower()
+        if name not in self.cities:
+            self.cities[name] = len(self.cities) + 1
+        return self.cities[name]
+
+    def _load_latest(self):
+        latest = {}
+        try:
+            with open(self._path('latest.bin'), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return latest
+        for key, first_seen, last_seen, price, city in LATEST.iter_unpack(data[:len(data) - len(data) % LATEST.size]):
+            latest[key] = [first_seen, last_seen, price, city]
+        return latest
+
+    def _save_latest(self, latest):
+        tmp_path = self._path('latest.bin.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(LATEST.pack(key, *state) for key, state in latest.items()))
+        os.replace(tmp_path, self._path('latest.bin'))
+
+    def record_run(self, listings, city, ts=None):
+        """Append one observation per listing and return the events this run produced.
+
+        Also annotates each listing with first_seen_at / days_on_market and, after a
+        price change, previous_price.
+        """
+        with open(self._path('.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Stamped under the lock, so concurrent runs append events.bin in time order
+            ts = int(ts or time.time())
+            # Re-read under the lock - another scraper process may have added cities
+            self.cities = self._load_json('cities.json', {})
+            city = self.city_id(city)
+            latest = self._load_latest()
+
+            observations = []
+            events = []
+            new_meta = []
+            seen_this_run = set()
+            for listing in listings:
+                price = int(listing.get('price') or 0)
+                if price <= 0:
+                    continue
+                key = listing_key(listing)
+                if key in seen_this_run:
+                    continue
+                seen_this_run.add(key)
+                observations.append(OBSERVATION.pack(key, ts, price, city))
+
+                state = latest.get(key)
+                if state is None:
+                    latest[key] = [ts, ts, price, city]
+                    events.append((ts, EVENT_NEW, city, key, 0, price))
+                    new_meta.append({'key': key, 'url': listing.get('property_url'), 'address': listing.get('address')})
+                    state = latest[key]
+                else:
+                    if price != state[2]:
+                        kind = EVENT_DROP if price < state[2] else EVENT_RISE
+                        events.append((ts, kind, city, key, state[2], price))
+                        listing['previous_price'] = state[2]
+                    state[1], state[2] = ts, price
+
+                listing['first_seen_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(state[0]))
+                listing['days_on_market'] = (ts - state[0]) // 86400
+
+            with open(self._path('observations.bin'), 'ab') as f:
+                f.write(b''.join(observations))
+            with open(self._path('events.bin'), 'ab') as f:
+                f.write(b''.join(EVENT.pack(*e) for e in events))
+            if new_meta:
+                with open(self._path('listings.jsonl'), 'a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(m, ensure_ascii=False) + '\n' for m in new_meta))
+            self._save_latest(latest)
+            with open(self._path('cities.json'), 'w', encoding='utf-8') as f:
+                json.dump(self.cities, f)
+
+        return [self._event_dict(e) for e in events]
+
+    def _event_dict(self, event, meta=None):
+        ts, kind, city, key, old_price, new_price = event
+        city_names = {v: k for k, v in self.cities.items()}
+        result = {
+            'ts': ts,
+            'event': EVENT_NAMES.get(kind, kind),
+            'city': city_names.get(city),
+            'listing_key': key,
+            'old_price': old_price or None,
+            'new_price': new_price,
+        }
+        if old_price and kind == EVENT_DROP:
+            result['drop_pct'] = round((old_price - new_price) / old_price * 100, 2)
+        if meta and key in meta:
+            result.update(url=meta[key].get('url'), address=meta[key].get('address'))
+        return result
+
+    def events_since(self, since_ts, kind=None, city=None):
+        """Events at or after since_ts, optionally for one kind and city"""
+        path = self._path('events.bin')
+        if not os.path.exists(path) or os.path.getsize(path) < EVENT.size:
+            return []
+        city_filter = self.cities.get(city.strip().lower()) if city else None
+        if city and city_filter is None:
+            return []
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            count = len(mm) // EVENT.size
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if struct.unpack_from('<I', mm, mid * EVENT.size)[0] < since_ts:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            raw = [EVENT.unpack_from(mm, i * EVENT.size) for i in range(lo, count)]
+
+        meta = {}
+        try:
+            with open(self._path('listings.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    entry = json.loads(line)
+                    meta[entry['key']] = entry
+        except (OSError, ValueError):
+            pass
+
+        return [self._event_dict(e, meta) for e in raw
+                if (kind is None or e[1] == kind) and (city_filter is None or e[2] == city_filter)]
+
+
+def summarise_events(events):
+    counts = {}
+    for event in events:
+        counts[event['event']] = counts.get(event['event'], 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the scraped listing price history")
+    parser.add_argument('command', choices=['drops', 'events'])
+    parser.add_argument('--city')
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--kind', choices=list(EVENT_NAMES.values()), help="Event kind for 'events'")
+    parser.add_argument('--dir', default=None, help="History directory (default: SCRAPER_HISTORY_DIR)")
+    args = parser.parse_args()
+
+    history = PriceHistory(args.dir)
+    since = int(time.time() - args.days * 86400)
+    if args.command == 'drops':
+        kind = EVENT_DROP
+    else:
+        kind = next((k for k, v in EVENT_NAMES.items() if v == args.kind), None)
+
+    events = history.events_since(since, kind=kind, city=args.city)
+    print(json.dumps(events, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Recompute investment metrics over stored listings without re-scraping.
+
+After tuning the rent tables or the cost assumptions, this streams stored
+listings through calculate_investment_analysis in batches and rewrites the
+metrics in place (atomic replace per file). No network access.
+
+Understood stores:
+    Node scrape cache ({hash: {properties: [...]}})   city from each property
+    warm cache entries, or the whole warm cache dir   city from the entry's query
+    scraper output (JSON array)                       --city required
+    JSON lines, one listing per line                  --city required
+
+Rent estimates draw from the RNG; each listing is seeded from its listing key,
+so re-running with unchanged tables leaves the stored metrics unchanged.
+
+By default only the warm cache is rewritten. ScrapingService holds the Node
+cache in memory and writes it back over the file, so re-analyse that only
+with the Node server stopped, by passing its path explicitly.
+
+    python3 reanalyse.py                        # warm cache
+    python3 reanalyse.py .local/scrape_cache.json   # Node cache - stop the server first
+    python3 reanalyse.py results.json --city Leeds
+    python3 reanalyse.py listings.jsonl --city Leeds --dry-run
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from itertools import islice
+
+from prime_scraper import ANALYSIS_FIELDS, calculate_investment_analysis
+from price_history import listing_key
+from warm_cache import default_warm_dir
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def default_node_cache_path():
+    """Same location ScrapingService keeps its result cache"""
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/scrape_cache.json'
+    return os.path.join('.local', 'scrape_cache.json')
+
+
+def reanalyse_listing(listing, city):
+    """Overwrite the listing's analysis fields; returns True if any value changed, None if skipped"""
+    price = int(listing.get('price') or 0)
+    city = listing.get('city') or city
+    if price <= 0 or not city:
+        return None
+
+    random.seed(listing_key({'property_url': listing.get('property_url') or listing.get('propertyUrl'),
+                             'address': listing.get('address')}))
+    analysis = calculate_investment_analysis(
+        price=price,
+        bedrooms=int(listing.get('bedrooms') or 1),
+        address=listing.get('address') or '',
+        area_sqm=listing.get('area_sqm'),
+        city=city
+    )
+    # Only touch the metrics this store keeps (the Node cache keeps a subset)
+    fields = [name for name in ANALYSIS_FIELDS if name in listing] or ANALYSIS_FIELDS
+    changed = any(listing.get(name) != analysis[name] for name in fields)
+    for name in fields:
+        listing[name] = analysis[name]
+    return changed
+
+
+def reanalyse_batches(listings, city, stats, batch_size=DEFAULT_BATCH_SIZE):
+    """Re-analyse an iterable of listings batch by batch, yielding each finished batch"""
+    listings = iter(listings)
+    while True:
+        batch = list(islice(listings, batch_size))
+        if not batch:
+            return
+        for listing in batch:
+            result = reanalyse_listing(listing, city)
+            stats['listings'] += 1
+            if result is None:
+                stats['skipped'] += 1
+            elif result:
+                stats['changed'] += 1
+        yield batch
+
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def reanalyse_json(path, city, stats, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    indent = None
+    if isinstance(data, list):
+        groups = [(data, city)]
+    elif 'properties' in data:
+        groups = [(data['properties'], (data.get('query') or {}).get('city') or city)]
+    else:
+        # Node cache - keep the layout ScrapingService writes
+        groups = [(entry.get('properties', []), city) for entry in data.values() if isinstance(entry, dict)]
+        indent = 2
+
+    for listings, group_city in groups:
+        for _ in reanalyse_batches(listings, group_city, stats, batch_size):
+            pass
+
+    if not dry_run:
+        _write_atomic(path, lambda f: json.dump(data, f, ensure_ascii=False, indent=indent))
+
+
+def reanalyse_jsonl(path, city, stats, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Line-by-line: never holds more than one batch in memory"""
+    def listings(f):
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+    with open(path, 'r', encoding='utf-8') as src:
+        if dry_run:
+            for _ in reanalyse_batches(listings(src), city, stats, batch_size):
+                pass
+            return
+
+        def write(out):
+            for batch in reanalyse_batches(listings(src), city, stats, batch_size):
+                out.write(''.join(json.dumps(listing, ensure_ascii=False) + '\n' for listing in batch))
+
+        _write_atomic(path, write)
+
+
+def expand_targets(paths):
+    """Files to process; directories (the warm cache) expand to their .json entries"""
+    targets = []
+    for path in paths:
+        if os.path.isdir(path):
+            targets.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json'))
+        elif os.path.exists(path):
+            targets.append(path)
+        else:
+            print(f"⚠️ {path} not found, skipping", file=sys.stderr)
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute investment metrics over stored listings")
+    parser.add_argument('paths', nargs='*', help="Stores to re-analyse (default: the warm cache)")
+    parser.add_argument('--city', help="City for listings whose store doesn't record one")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args()
+
+    targets = expand_targets(args.paths or [default_warm_dir()])
+    node_cache = os.path.abspath(default_node_cache_path())
+    if not args.dry_run and any(os.path.abspath(path) == node_cache for path in targets):
+        print(f"⚠️ {node_cache} is the Node server's cache - make sure the server is stopped, "
+              f"or it will overwrite these changes with its in-memory copy", file=sys.stderr)
+    rng_state = random.getstate()
+    started = time.time()
+    totals = {'listings': 0, 'changed': 0, 'skipped': 0}
+    for path in targets:
+        stats = {'listings': 0, 'changed': 0, 'skipped': 0}
+        try:
+            if path.endswith('.jsonl'):
+                reanalyse_jsonl(path, args.city, stats, args.batch_size, args.dry_run)
+            else:
+                reanalyse_json(path, args.city, stats, args.batch_size, args.dry_run)
+        except (OSError, ValueError) as e:
+            print(f"❌ Couldn't re-analyse {path}: {e}", file=sys.stderr)
+            continue
+        print(f"📈 {path}: {stats['changed']}/{stats['listings']} listings changed"
+              + (f", {stats['skipped']} skipped (no price or city)" if stats['skipped'] else ''), file=sys.stderr)
+        for key in totals:
+            totals[key] += stats[key]
+    random.setstate(rng_state)
+
+    verb = "would change" if args.dry_run else "updated"
+    print(f"✅ Re-analysed {totals['listings']} listings in {len(targets)} files, {totals['changed']} {verb} "
+          f"({time.time() - started:.2f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Stale-while-revalidate refresh scheduler for popular searches.
+
+Reads the query log ScrapingService appends to (one JSON line per search,
+rotated to <log>.1 once it grows past a few MB), ranks (city, beds, price,
+keywords) combinations by recency-weighted frequency and re-scrapes the
+hottest ones before their warm cache entry expires, so user requests are
+answered from warm data instead of a live scrape. A run never sends more
+than --budget requests: the job that reaches it stops fetching and keeps its
+journal, so the next run resumes it. Jobs are staggered so the portals see a
+trickle rather than a burst.
+
+    python3 refresh_scheduler.py --budget 200 --top 20
+    python3 refresh_scheduler.py --interval 600          # keep running
+    python3 refresh_scheduler.py --dry-run
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import prime_scraper
+from prime_scraper import build_search_urls, open_journal, run_search, polite_sleep
+from http_transport import CountingAdapter
+from host_health import HostHealth, default_health_path
+from price_history import PriceHistory
+from warm_cache import WARM_TTL_S, entry_age
+
+
+def default_query_log_path():
+    """Same location ScrapingService.logQuery writes to"""
+    configured = os.environ.get('SCRAPER_QUERY_LOG')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/query_log.jsonl'
+    return os.path.join('.local', 'query_log.jsonl')
+
+
+def _log_lines(path):
+    """Lines of the rotated-out generation (<path>.1), then the current log"""
+    for generation in (path + '.1', path):
+        try:
+            f = open(generation, 'r', encoding='utf-8')
+        except OSError:
+            continue
+        with f:
+            yield from f
+
+
+def load_query_stats(path, window_s, half_life_s, now=None):
+    """Recency-weighted hit counts per query over the last window_s seconds"""
+    now = now or time.time()
+    stats = {}
+    for line in _log_lines(path):
+        try:
+            entry = json.loads(line)
+            ts = float(entry['ts'])
+            ts = ts / 1000 if ts > 1e11 else ts  # Node writes Date.now() milliseconds
+            city = str(entry['city']).strip()
+            query = (city, int(entry.get('minBedrooms') or 1), int(entry.get('maxPrice') or 500000),
+                     entry.get('keywords') or 'HMO')
+        except (ValueError, KeyError, TypeError):
+            continue
+        if not city or now - ts > window_s:
+            continue
+        key = (city.lower(),) + query[1:]
+        stat = stats.setdefault(key, {'query': query, 'count': 0, 'weight': 0.0, 'last_ts': 0})
+        stat['count'] += 1
+        stat['weight'] += 0.5 ** ((now - ts) / half_life_s)
+        if ts >= stat['last_ts']:
+            # Keep the most recent spelling - it is what the next spawn will pass
+            stat['last_ts'], stat['query'] = ts, query
+    return stats
+
+
+def plan_refreshes(stats, ttl_s, lead_s, top):
+    """Hottest queries whose warm entry is missing or expires within lead_s"""
+    plan = []
+    for stat in sorted(stats.values(), key=lambda s: s['weight'], reverse=True):
+        age = entry_age(*stat['query'])
+        if age is not None and age < ttl_s - lead_s:
+            continue
+        plan.append(dict(stat, age=age))
+        if len(plan) >= top:
+            break
+    return plan
+
+
+def run_once(args):
+    stats = load_query_stats(args.log, args.window_hours * 3600, args.half_life_hours * 3600)
+    plan = plan_refreshes(stats, args.ttl, args.lead, args.top)
+    print(f"🗓️ {len(stats)} distinct queries in log, {len(plan)} due for refresh (budget {args.budget} requests)", file=sys.stderr)
+
+    if args.dry_run:
+        print(json.dumps([{'query': p['query'], 'hits': p['count'], 'weight': round(p['weight'], 2),
+                           'age_s': None if p['age'] is None else int(p['age'])} for p in plan], indent=2))
+        return 0
+
+    host_health = HostHealth(default_health_path())
+    history = PriceHistory()
+    spent = 0
+    refreshed = 0
+    per_job_estimate = None
+
+    for job in plan:
+        city, min_bedrooms, max_price, keywords = job['query']
+        # Don't start a job that likely won't fit: before the first job assume one request per
+        # search URL, afterwards use what jobs really cost. The adapter limit is the hard cap.
+        estimate = per_job_estimate or len(build_search_urls(city, min_bedrooms, max_price, keywords))
+        if spent + estimate > args.budget:
+            print(f"💸 Request budget reached ({spent}/{args.budget}), deferring remaining jobs", file=sys.stderr)
+            break
+
+        if refreshed:
+            polite_sleep(args.stagger * 0.5, args.stagger * 1.5)
+
+        print(f"🔄 Refreshing {city} {min_bedrooms}+ beds ≤ £{max_price} '{keywords}' ({job['count']} hits)", file=sys.stderr)
+        counter = CountingAdapter(limit=args.budget - spent)
+        journal = open_journal(city, min_bedrooms, max_price, keywords)
+        try:
+            run_search(city, min_bedrooms, max_price, keywords, journal=journal, transport=counter,
+                       host_health=host_health, history=history)
+        except Exception as e:
+            print(f"❌ Refresh failed for {city}: {e}", file=sys.stderr)
+        finally:
+            if journal:
+                journal.close()
+
+        spent += counter.requests_sent
+        refreshed += 1
+        per_job_estimate = max(1, spent // refreshed)
+
+    print(f"✅ Refreshed {refreshed} queries using {spent} requests", file=sys.stderr)
+    return refreshed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh popular searches ahead of warm cache expiry")
+    parser.add_argument('--log', default=default_query_log_path(), help="Query log (JSON lines)")
+    parser.add_argument('--budget', type=int, default=200, help="Max portal requests per run")
+    parser.add_argument('--top', type=int, default=20, help="Max queries refreshed per run")
+    parser.add_argument('--window-hours', type=float, default=72, help="Only count searches this recent")
+    parser.add_argument('--half-life-hours', type=float, default=12, help="Recency weighting half-life")
+    parser.add_argument('--ttl', type=float, default=WARM_TTL_S, help="Warm cache lifetime in seconds")
+    parser.add_argument('--lead', type=float, default=300, help="Refresh entries expiring within this many seconds")
+    parser.add_argument('--stagger', type=float, default=20, help="Average pause between jobs in seconds")
+    parser.add_argument('--interval', type=float, default=None, help="Run every N seconds instead of once")
+    parser.add_argument('--dry-run', action='store_true', help="Print the refresh plan without scraping")
+    args = parser.parse_args()
+
+    prime_scraper.install_sigterm_handler()
+    while True:
+        run_once(args)
+        if not args.interval or args.dry_run:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
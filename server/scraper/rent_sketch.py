@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Observed rent per room per postcode district, kept in mergeable t-digests.
+
+prime_scraper.py --ingest-rents (or the ingest command below) scrapes to-rent
+search pages - whole-property lets converted to rent per room, and room
+lets - and adds each rent to a t-digest for its postcode district and one
+for its city. A digest holds a bounded number of centroids whatever the
+number of rents added, so quantiles update incrementally in constant memory,
+and two digests merge by merging centroids: batch workers can each write
+their own store and fold them together afterwards.
+
+Once a district (or, failing that, its city) has MIN_SAMPLES rents, the
+rent bands used by the investment analysis come from its quantiles
+(BAND_QUANTILES) instead of the gazetteer's rent table. Rents are stored
+as the portals quote them, per room per calendar month, but the table's
+monthly figures sit at weekly levels (Leeds premium £110-140 a room), so
+observed bands are scaled by TABLE_RENT_SCALE onto the table's scale before
+they stand in for it - listings priced from either rank together.
+
+The store is one JSON file (SCRAPER_RENT_SKETCHES, /tmp in production,
+.local otherwise), updated under an flock:
+
+    python3 rent_sketch.py ingest Leeds Manchester
+    python3 rent_sketch.py merge .local/rent_sketches.json worker1.json worker2.json
+    python3 rent_sketch.py show Leeds LS6
+"""
+import os
+import sys
+import json
+import math
+import time
+import fcntl
+import argparse
+
+from gazetteer import get_gazetteer, normalise
+from postcode_geo import extract_postcode
+
+DEFAULT_COMPRESSION = 100
+# Added rents are buffered and merged into the centroids this many at a time
+BUFFER_SIZE = 500
+# Fewer rents than this and the district (or city) falls back to the rent table
+MIN_SAMPLES = 20
+# Quantile range of the observed rents each rent band is drawn from
+BAND_QUANTILES = {
+    'budget': (0.05, 0.30),
+    'student': (0.30, 0.55),
+    'good': (0.55, 0.80),
+    'premium': (0.80, 0.95),
+}
+STORE_VERSION = 1
+# Observed rent per room per calendar month -> the gazetteer rent table's scale
+TABLE_RENT_SCALE = 12 / 52
+
+
+def default_sketch_path():
+    configured = os.environ.get('SCRAPER_RENT_SKETCHES')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/rent_sketches.json'
+    return os.path.join('.local', 'rent_sketches.json')
+
+
+def postcode_district(postcode):
+    """'LS6 2AB' / 'LS6' -> 'LS6'; None for no postcode"""
+    return postcode.split()[0].upper() if postcode else None
+
+
+def city_key(city):
+    town = get_gazetteer().resolve(city)
+    return town['slug'] if town else normalise(city)
+
+
+class RentDigest:
+    """Merging t-digest: centroids [mean, weight] sorted by mean, smallest at the tails"""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.centroids = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self._buffer.append([float(value), weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= BUFFER_SIZE:
+            self._compress()
+
+    def merge(self, other):
+        if not other.count:
+            return
+        other._compress()
+        self._buffer.extend([mean, weight] for mean, weight in other.centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _scale(self, q):
+        """k1 scale function: steep near q=0 and q=1, so tail centroids stay small"""
+        return self.compression / (2 * math.pi) * math.asin(2 * min(1.0, max(0.0, q)) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        merged = [points[0]]
+        before = 0  # weight of the finished centroids left of merged[-1]
+        k_left = self._scale(0)
+        for mean, weight in points[1:]:
+            last = merged[-1]
+            combined = last[1] + weight
+            # A centroid may span at most one unit of the scale, which bounds their number
+            if self._scale((before + combined) / self.count) - k_left <= 1:
+                last[0] += (mean - last[0]) * weight / combined
+                last[1] = combined
+            else:
+                before += last[1]
+                k_left = self._scale(before / self.count)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """Rent at quantile q (0-1), interpolating between centroid centres; None if empty"""
+        self._compress()
+        if not self.centroids:
+            return None
+        target = q * self.count
+        prev_mean, prev_pos = self.min, 0
+        cumulative = 0
+        for mean, weight in self.centroids:
+            pos = cumulative + weight / 2
+            if target < pos:
+                return prev_mean + (mean - prev_mean) * (target - prev_pos) / (pos - prev_pos)
+            prev_mean, prev_pos = mean, pos
+            cumulative += weight
+        span = self.count - prev_pos
+        return prev_mean + (self.max - prev_mean) * ((target - prev_pos) / span if span else 0)
+
+    def to_dict(self):
+        self._compress()
+        return {
+            'compression': self.compression,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'centroids': [[round(mean, 2), weight] for mean, weight in self.centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data.get('compression', DEFAULT_COMPRESSION))
+        digest.centroids = [list(c) for c in data['centroids']]
+        digest.count = data['count']
+        if digest.count:
+            digest.min = data['min']
+            digest.max = data['max']
+        return digest
+
+
+class RentSketches:
+    """Rent digests per postcode district and per city"""
+
+    def __init__(self, districts=None, cities=None):
+        self.districts = districts or {}
+        self.cities = cities or {}
+        self._ranges = {}
+
+    def add(self, city, postcode, rent_per_room):
+        district = postcode_district(postcode)
+        if district:
+            self.districts.setdefault(district, RentDigest()).add(rent_per_room)
+        self.cities.setdefault(city_key(city), RentDigest()).add(rent_per_room)
+        self._ranges.clear()
+
+    def merge(self, other):
+        for mine, theirs in ((self.districts, other.districts), (self.cities, other.cities)):
+            for key, digest in theirs.items():
+                mine.setdefault(key, RentDigest()).merge(digest)
+        self._ranges.clear()
+
+    @property
+    def count(self):
+        return sum(digest.count for digest in self.cities.values())
+
+    def digest_for(self, city, postcode):
+        """The district's digest if it has MIN_SAMPLES rents, else the city's, else None"""
+        digest = self.districts.get(postcode_district(postcode))
+        if digest and digest.count >= MIN_SAMPLES:
+            return digest
+        digest = self.cities.get(city_key(city))
+        if digest and digest.count >= MIN_SAMPLES:
+            return digest
+        return None
+
+    def band_rates(self, city, address):
+        """Observed rent per room range for every rent band at this address, on the rent table's scale, or None"""
+        if not self.cities:
+            return None
+        postcode = extract_postcode(address)
+        key = (postcode_district(postcode), normalise(city))
+        if key not in self._ranges:
+            digest = self.digest_for(city, postcode)
+            self._ranges[key] = {band: (int(digest.quantile(low) * TABLE_RENT_SCALE),
+                                        int(digest.quantile(high) * TABLE_RENT_SCALE))
+                                 for band, (low, high) in BAND_QUANTILES.items()} if digest else None
+        return self._ranges[key]
+
+    def to_dict(self):
+        return {
+            'version': STORE_VERSION,
+            'updated_at': time.time(),
+            'districts': {key: digest.to_dict() for key, digest in sorted(self.districts.items())},
+            'cities': {key: digest.to_dict() for key, digest in sorted(self.cities.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({key: RentDigest.from_dict(d) for key, d in data.get('districts', {}).items()},
+                   {key: RentDigest.from_dict(d) for key, d in data.get('cities', {}).items()})
+
+
+def load_sketches(path):
+    """Store at path; empty if it doesn't exist yet or can't be read"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return RentSketches.from_dict(json.load(f))
+    except FileNotFoundError:
+        return RentSketches()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Rent sketches unreadable ({e}), using the rent table", file=sys.stderr)
+        return RentSketches()
+
+
+def merge_into_store(sketches, path=None):
+    """Merge sketches into the store at path (default store if None) under its lock; returns the merged store"""
+    path = path or default_sketch_path()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stored = load_sketches(path)
+        stored.merge(sketches)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    global _default_sketches
+    if _default_sketches is not None and os.path.abspath(path) == os.path.abspath(default_sketch_path()):
+        _default_sketches = stored
+    return stored
+
+
+_default_sketches = None
+
+
+def get_rent_sketches():
+    """The default store, loaded once per process"""
+    global _default_sketches
+    if _default_sketches is None:
+        _default_sketches = load_sketches(default_sketch_path())
+    return _default_sketches
+
+
+def print_summary(sketches, keys):
+    for key in keys:
+        district = key.strip().upper()
+        digest = sketches.districts.get(district) or sketches.cities.get(city_key(key))
+        if not digest:
+            print(f"{key}\tno rents observed")
+            continue
+        quantiles = ', '.join(f"p{int(q * 100)} £{digest.quantile(q):.0f}" for q in (0.1, 0.25, 0.5, 0.75, 0.9))
+        print(f"{key}\t{digest.count} rents\t{quantiles}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Observed rent per room sketches by postcode district")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ingest = sub.add_parser('ingest', help="Scrape to-rent listings for cities into the store")
+    ingest.add_argument('cities', nargs='+')
+    ingest.add_argument('--store', help="Store to update (default: SCRAPER_RENT_SKETCHES or .local/rent_sketches.json)")
+    ingest.add_argument('--portal-url', default=os.environ.get('SCRAPER_PORTAL_URL'),
+                        help="Send requests to a stand-in portal (mock_portal.py)")
+
+    merge = sub.add_parser('merge', help="Fold worker stores into one")
+    merge.add_argument('target')
+    merge.add_argument('sources', nargs='+')
+
+    show = sub.add_parser('show', help="Observed rent quantiles for cities or postcode districts")
+    show.add_argument('keys', nargs='+')
+    show.add_argument('--store')
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        from http_transport import build_transport
+        from prime_scraper import scrape_rent_comparables, setup_session
+
+        transport, _ = build_transport(portal_url=args.portal_url)
+        session = setup_session(transport)
+        sketches = RentSketches()
+        for city in args.cities:
+            sketches.merge(scrape_rent_comparables(city, session))
+        stored = merge_into_store(sketches, args.store)
+        print(f"✅ Added {sketches.count} rents; store now has {stored.count} rents in "
+              f"{len(stored.districts)} districts", file=sys.stderr)
+    elif args.command == 'merge':
+        sketches = RentSketches()
+        for source in args.sources:
+            sketches.merge(load_sketches(source))
+        stored = merge_into_store(sketches, args.target)
+        print(f"✅ Merged {len(args.sources)} stores ({sketches.count} rents) into {args.target}: "
+              f"{stored.count} rents in {len(stored.districts)} districts", file=sys.stderr)
+    else:
+        print_summary(load_sketches(args.store or default_sketch_path()), args.keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Monte Carlo scenario analysis for listing investment metrics.
+
+calculate_investment_analysis gives one point estimate. This samples, per
+draw: the rent band (the listing's own band, or a neighbouring one), rent
+within the band, void fraction, mortgage interest rate and running-cost
+ratio, and reports p10/p50/p90 for gross yield, net yield, monthly cash flow
+and cash-on-cash ROI, plus the probability of negative cash flow.
+
+Every listing is evaluated against the same draws (common random numbers),
+so listings are compared under identical market scenarios. The draw grid is
+cached per (draws, seed, assumptions) and results per listing inputs, so
+repeated searches reuse them. numpy is used when installed; without it the
+same model runs in pure Python.
+
+    python3 scenario_analysis.py results.json --city Leeds --draws 5000
+    python3 prime_scraper.py Leeds 4 300000 HMO --scenarios 2000
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from prime_scraper import rent_band_for_listing, rent_rates_for_listing
+
+DEFAULT_DRAWS = 2000
+PERCENTILES = (10, 50, 90)
+BAND_ORDER = ('budget', 'student', 'good', 'premium')
+METRICS = ('gross_yield', 'net_yield', 'monthly_cashflow', 'roi_on_deposit')
+
+Assumptions = namedtuple('Assumptions', [
+    'deposit_ratio',   # share of the price paid in cash; the rest is an interest-only mortgage
+    'rate_mean', 'rate_sd', 'rate_min', 'rate_max',
+    'void_mean',       # mean share of the year rooms stand empty (Beta(2, b) distributed)
+    'cost_min', 'cost_max',
+    'band_shift',      # chance, each way, that the area lets like the neighbouring rent band
+])
+DEFAULT_ASSUMPTIONS = Assumptions(0.25, 0.055, 0.01, 0.01, 0.12, 0.08, 0.08, 0.20, 0.15)
+
+
+@lru_cache(maxsize=32)
+def scenario_draws(draws, seed, assumptions):
+    """The shared draw grid: (band_u, rent_u, void, rate, cost), one value per draw"""
+    a = assumptions
+    void_beta = 2 * (1 - a.void_mean) / a.void_mean
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        return (rng.random(draws), rng.random(draws), rng.beta(2, void_beta, draws),
+                np.clip(rng.normal(a.rate_mean, a.rate_sd, draws), a.rate_min, a.rate_max),
+                rng.uniform(a.cost_min, a.cost_max, draws))
+
+    rng = random.Random(seed)
+    band_u = tuple(rng.random() for _ in range(draws))
+    rent_u = tuple(rng.random() for _ in range(draws))
+    void = tuple(rng.betavariate(2, void_beta) for _ in range(draws))
+    rate = tuple(min(a.rate_max, max(a.rate_min, rng.gauss(a.rate_mean, a.rate_sd))) for _ in range(draws))
+    cost = tuple(rng.uniform(a.cost_min, a.cost_max) for _ in range(draws))
+    return band_u, rent_u, void, rate, cost
+
+
+def _percentiles(values):
+    """Linear-interpolated percentiles (numpy's default method) of a list"""
+    ordered = sorted(values)
+    result = []
+    for pct in PERCENTILES:
+        k = (len(ordered) - 1) * pct / 100
+        lo = int(k)
+        hi = min(lo + 1, len(ordered) - 1)
+        result.append(ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo))
+    return result
+
+
+@lru_cache(maxsize=4096)
+def listing_scenarios(price, bedrooms, bands, draws, seed, assumptions):
+    """Percentiles per metric plus P(cash flow < 0) for one listing.
+
+    bands is (lower neighbour, own, upper neighbour) rent-per-room ranges; a
+    missing neighbour is None. Returns plain tuples (safe to share from the cache).
+    """
+    band_u, rent_u, void, rate, cost = scenario_draws(draws, seed, assumptions)
+    lower, own, upper = bands
+    shift = assumptions.band_shift
+    deposit = price * assumptions.deposit_ratio
+    mortgage = price - deposit
+
+    if np is not None:
+        lo = np.full(draws, float(own[0]))
+        hi = np.full(draws, float(own[1]))
+        if lower:
+            pick = band_u < shift
+            lo[pick], hi[pick] = lower
+        if upper:
+            pick = band_u >= 1 - shift
+            lo[pick], hi[pick] = upper
+        collected = (lo + rent_u * (hi - lo)) * bedrooms * 12 * (1 - void)
+        net = collected * (1 - cost)
+        cashflow = net - mortgage * rate
+        series = (collected / price * 100, net / price * 100, cashflow / 12, cashflow / deposit * 100)
+        summary = tuple(tuple(float(v) for v in np.percentile(s, PERCENTILES)) for s in series)
+        return summary, float(np.mean(cashflow < 0))
+
+    series = ([], [], [], [])
+    losses = 0
+    for i in range(draws):
+        lo, hi = lower if lower and band_u[i] < shift else upper if upper and band_u[i] >= 1 - shift else own
+        collected = (lo + rent_u[i] * (hi - lo)) * bedrooms * 12 * (1 - void[i])
+        net = collected * (1 - cost[i])
+        cashflow = net - mortgage * rate[i]
+        series[0].append(collected / price * 100)
+        series[1].append(net / price * 100)
+        series[2].append(cashflow / 12)
+        series[3].append(cashflow / deposit * 100)
+        losses += cashflow < 0
+    return tuple(tuple(_percentiles(s)) for s in series), losses / draws
+
+
+def listing_bands(listing, city):
+    """(lower, own, upper) rent bands for a listing, as listing_scenarios expects
+
+    Raises ValueError when neither the listing nor the caller names a city: the
+    default rent tier would give confident but wrong percentiles.
+    """
+    city = listing.get('city') or city
+    if not city:
+        raise ValueError(f"no city for listing {listing.get('address') or listing.get('property_url')!r}")
+    bedrooms = int(listing.get('bedrooms') or 1)
+    band, own = rent_band_for_listing(city, listing.get('address'), bedrooms)
+    rates = rent_rates_for_listing(city, listing.get('address'))
+    i = BAND_ORDER.index(band)
+    lower = tuple(rates[BAND_ORDER[i - 1]]) if i > 0 else None
+    upper = tuple(rates[BAND_ORDER[i + 1]]) if i + 1 < len(BAND_ORDER) else None
+    return lower, tuple(own), upper
+
+
+def annotate_scenarios(listings, city, draws=DEFAULT_DRAWS, seed=0, assumptions=DEFAULT_ASSUMPTIONS):
+    """Add a 'scenarios' dict to every listing with a price; returns how many were annotated"""
+    started = time.time()
+    annotated = 0
+    for listing in listings:
+        price = int(listing.get('price') or 0)
+        if price <= 0:
+            continue
+        summary, prob_loss = listing_scenarios(price, int(listing.get('bedrooms') or 1), listing_bands(listing, city),
+                                               draws, seed, assumptions)
+        scenarios = {metric: {f"p{pct}": round(value, 2) for pct, value in zip(PERCENTILES, values)}
+                     for metric, values in zip(METRICS, summary)}
+        scenarios['prob_negative_cashflow'] = round(prob_loss, 3)
+        scenarios['draws'] = draws
+        listing['scenarios'] = scenarios
+        annotated += 1
+    print(f"🎲 Scenario analysis: {annotated} listings × {draws} draws in {time.time() - started:.2f}s"
+          f"{'' if np is not None else ' (pure Python, numpy not installed)'}", file=sys.stderr)
+    return annotated
+
+
+def add_assumption_arguments(parser):
+    d = DEFAULT_ASSUMPTIONS
+    parser.add_argument('--deposit', type=float, default=d.deposit_ratio, help="Deposit share of the price")
+    parser.add_argument('--rate-mean', type=float, default=d.rate_mean, help="Mean mortgage interest rate")
+    parser.add_argument('--rate-sd', type=float, default=d.rate_sd, help="Interest rate standard deviation")
+    parser.add_argument('--void-mean', type=float, default=d.void_mean, help="Mean void fraction")
+    parser.add_argument('--cost-min', type=float, default=d.cost_min, help="Lowest running-cost share of rent")
+    parser.add_argument('--cost-max', type=float, default=d.cost_max, help="Highest running-cost share of rent")
+
+
+def assumptions_from_args(args):
+    return DEFAULT_ASSUMPTIONS._replace(deposit_ratio=args.deposit, rate_mean=args.rate_mean, rate_sd=args.rate_sd,
+                                        void_mean=args.void_mean, cost_min=args.cost_min, cost_max=args.cost_max)
+
+
+def main():
+    from spatial_index import load_listings
+
+    parser = argparse.ArgumentParser(description="Monte Carlo yield/ROI ranges for stored listings")
+    parser.add_argument('listings', help="Scraper JSON output or scrape_cache.json")
+    parser.add_argument('--city', help="City for listings that don't record one (required if any don't)")
+    parser.add_argument('--draws', type=int, default=DEFAULT_DRAWS)
+    parser.add_argument('--seed', type=int, default=0)
+    add_assumption_arguments(parser)
+    args = parser.parse_args()
+
+    listings = load_listings(args.listings)
+    missing = sum(1 for listing in listings if not listing.get('city'))
+    if missing and not args.city:
+        print(f"❌ {missing} listings don't record their city - pass --city", file=sys.stderr)
+        sys.exit(1)
+    annotate_scenarios(listings, args.city, args.draws, args.seed, assumptions_from_args(args))
+    print(json.dumps(listings, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Grid spatial index over scraped listings for radius, bounding-box and nearest-N queries.
+
+Listings are bucketed into fixed lat/lon cells using the coordinates from
+postcode_geo (postcode or district centroids), so a query only touches the
+handful of cells overlapping its area instead of scanning every listing.
+
+Used by prime_scraper.py (--near/--radius-miles/--bbox/--nearest) on a fresh
+scrape, and standalone over stored results:
+
+    python3 spatial_index.py results.json --near "LS2 9JT" --radius-miles 2
+    python3 spatial_index.py .local/scrape_cache.json --near 53.80,-1.55 --nearest 10
+"""
+import sys
+import json
+import math
+import argparse
+
+from postcode_geo import get_default_table
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """Uniform grid of lat/lon cells (0.02° ≈ 1.4 miles north-south by default)"""
+
+    def __init__(self, cell_degrees=0.02):
+        self.cell = cell_degrees
+        self.cells = {}
+        self.size = 0
+
+    def _cell_of(self, lat, lon):
+        return int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+
+    def insert(self, item, lat, lon):
+        self.cells.setdefault(self._cell_of(lat, lon), []).append((lat, lon, item))
+        self.size += 1
+
+    @classmethod
+    def from_listings(cls, listings, cell_degrees=0.02):
+        """Index listings that carry latitude/longitude; the rest are left out"""
+        index = cls(cell_degrees)
+        for listing in listings:
+            lat, lon = listing.get('latitude'), listing.get('longitude')
+            if lat is not None and lon is not None:
+                index.insert(listing, lat, lon)
+        return index
+
+    def _cells_in_range(self, south, west, north, east):
+        row_min, col_min = self._cell_of(south, west)
+        row_max, col_max = self._cell_of(north, east)
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                bucket = self.cells.get((row, col))
+                if bucket:
+                    yield bucket
+
+    def within_bbox(self, south, west, north, east):
+        """Items whose point lies inside the box"""
+        results = []
+        for bucket in self._cells_in_range(south, west, north, east):
+            for lat, lon, item in bucket:
+                if south <= lat <= north and west <= lon <= east:
+                    results.append(item)
+        return results
+
+    def within_radius(self, lat, lon, radius_miles):
+        """[(distance_miles, item)] inside the radius, nearest first"""
+        dlat = radius_miles / MILES_PER_DEGREE_LAT
+        dlon = radius_miles / (MILES_PER_DEGREE_LAT * max(0.01, math.cos(math.radians(lat))))
+        results = []
+        for bucket in self._cells_in_range(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            for item_lat, item_lon, item in bucket:
+                distance = haversine_miles(lat, lon, item_lat, item_lon)
+                if distance <= radius_miles:
+                    results.append((distance, item))
+        results.sort(key=lambda pair: pair[0])
+        return results
+
+    def _ring_cells(self, row0, col0, ring):
+        if ring == 0:
+            yield row0, col0
+            return
+        for col in range(col0 - ring, col0 + ring + 1):
+            yield row0 - ring, col
+            yield row0 + ring, col
+        for row in range(row0 - ring + 1, row0 + ring):
+            yield row, col0 - ring
+            yield row, col0 + ring
+
+    def nearest(self, lat, lon, n):
+        """[(distance_miles, item)] for the n closest items, searching outward ring by ring"""
+        if n <= 0 or not self.size:
+            return []
+        row0, col0 = self._cell_of(lat, lon)
+        max_ring = max(max(abs(r - row0), abs(c - col0)) for r, c in self.cells)
+
+        # Far-away or sparse data: rings would visit more empty cells than there are items
+        if (2 * max_ring + 1) ** 2 > 4 * len(self.cells) + 64:
+            found = [(haversine_miles(lat, lon, item_lat, item_lon), item)
+                     for bucket in self.cells.values() for item_lat, item_lon, item in bucket]
+            found.sort(key=lambda pair: pair[0])
+            return found[:n]
+
+        # Smallest extent of one cell in miles - items beyond ring k are at least k * this away
+        cell_miles = self.cell * MILES_PER_DEGREE_LAT * math.cos(math.radians(min(89.0, abs(lat) + self.cell * (max_ring + 1))))
+        found = []
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(row0, col0, ring):
+                for item_lat, item_lon, item in self.cells.get(cell, ()):
+                    found.append((haversine_miles(lat, lon, item_lat, item_lon), item))
+            if len(found) >= n:
+                found.sort(key=lambda pair: pair[0])
+                if found[n - 1][0] <= ring * cell_miles:
+                    break
+        found.sort(key=lambda pair: pair[0])
+        return found[:n]
+
+
+def resolve_point(value):
+    """'lat,lon' or a (partial) postcode -> (lat, lon)"""
+    parts = value.split(',')
+    if len(parts) == 2:
+        try:
+            return float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+    table = get_default_table()
+    coords = table.lookup(value) if table else None
+    if not coords:
+        raise ValueError(f"Can't resolve '{value}' to coordinates (need lat,lon or a postcode in the postcode table)")
+    return coords
+
+
+def apply_spatial_filter(listings, near=None, radius_miles=None, bbox=None, nearest=None):
+    """Narrow listings to a radius / box / nearest-N around a point; returns listings unchanged if no filter"""
+    if not (bbox or (near and (radius_miles or nearest))):
+        return listings
+
+    index = SpatialIndex.from_listings(listings)
+    skipped = len(listings) - index.size
+    if skipped:
+        print(f"📍 {skipped} listings have no coordinates and are excluded from the spatial filter", file=sys.stderr)
+
+    if bbox:
+        south, west, north, east = bbox
+        results = index.within_bbox(south, west, north, east)
+        print(f"📦 {len(results)} listings inside bbox {bbox}", file=sys.stderr)
+        return results
+
+    lat, lon = resolve_point(near) if isinstance(near, str) else near
+    if radius_miles:
+        matches = index.within_radius(lat, lon, radius_miles)
+        if nearest:
+            matches = matches[:nearest]
+    else:
+        matches = index.nearest(lat, lon, nearest)
+
+    results = []
+    for distance, listing in matches:
+        listing['distance_miles'] = round(distance, 2)
+        results.append(listing)
+    print(f"🎯 {len(results)} listings near ({lat:.4f}, {lon:.4f})", file=sys.stderr)
+    return results
+
+
+def parse_bbox(value):
+    parts = [float(p) for p in value.split(',')]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("bbox must be south,west,north,east")
+    return parts
+
+
+def add_spatial_arguments(parser):
+    parser.add_argument('--near', help="Centre point: 'lat,lon' or a postcode / postcode district")
+    parser.add_argument('--radius-miles', type=float, help="Keep listings within this distance of --near")
+    parser.add_argument('--nearest', type=int, help="Keep only the N listings closest to --near")
+    parser.add_argument('--bbox', type=parse_bbox, help="Keep listings inside south,west,north,east")
+
+
+def load_listings(path):
+    """Scraper output (JSON array) or the Node scrape cache ({hash: {properties: [...]}})"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    listings = []
+    for entry in data.values():
+        listings.extend(entry.get('properties', []))
+    return listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spatial query over stored listings")
+    parser.add_argument('listings', help="Scraper JSON output or scrape_cache.json")
+    add_spatial_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        results = apply_spatial_filter(load_listings(args.listings), args.near, args.radius_miles, args.bbox, args.nearest)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
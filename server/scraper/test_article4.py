@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from article4 import Article4Index, load_index, tag_article4
+from postcode_geo import PostcodeTable, compile_table, geocode_address
+
+# lat, lon of each full postcode; the Article 4 area covers lon -1.60..-1.50, lat 53.79..53.81
+POSTCODES = {
+    'LS6 1AA': (53.800, -1.550),
+    'LS6 1AB': (53.801, -1.551),
+    'LS6 2AA': (53.800, -1.520),
+    'LS6 2AB': (53.800, -1.480),
+    'LS9 8AA': (53.700, -1.400),
+}
+
+
+@pytest.fixture
+def table(tmp_path):
+    csv_path = tmp_path / 'postcodes.csv'
+    csv_path.write_text('postcode,latitude,longitude\n' +
+                        ''.join(f"{pc},{lat},{lon}\n" for pc, (lat, lon) in POSTCODES.items()))
+    compile_table(str(csv_path), str(tmp_path / 'postcodes.bin'))
+    table = PostcodeTable(str(tmp_path / 'postcodes.bin'))
+    yield table
+    table.close()
+
+
+@pytest.fixture
+def geojson_path(tmp_path):
+    ring = [[-1.60, 53.79], [-1.50, 53.79], [-1.50, 53.81], [-1.60, 53.81], [-1.60, 53.79]]
+    path = tmp_path / 'areas.geojson'
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'name': 'Headingley'}, 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}]}))
+    return str(path)
+
+
+@pytest.fixture
+def index(geojson_path):
+    return Article4Index.from_geojson(geojson_path)
+
+
+def geocoded(address, table):
+    postcode, latitude, longitude, resolution = geocode_address(address, table)
+    return {'address': address, 'postcode': postcode, 'latitude': latitude, 'longitude': longitude,
+            'geocode_resolution': resolution}
+
+
+def test_lookup_reports_how_precisely_it_located_the_postcode(table):
+    lat, lon, resolution = table.locate('LS6 1AA')
+    assert (lat, lon) == pytest.approx((53.8, -1.55), abs=1e-5) and resolution == 'unit'
+    assert table.locate('LS6 1ZZ')[2] == 'sector'
+    assert table.locate('LS6 9ZZ')[2] == 'district'
+    assert table.locate('LS9')[2] == 'district'
+    assert table.locate('M1 1AA') is None
+    assert [lon for _, lon in sorted(table.sector_points('LS6 2'), key=lambda p: p[1])] == pytest.approx([-1.52, -1.48])
+
+
+def test_only_unit_and_one_sided_sector_points_are_tagged(table, index):
+    listings = [geocoded(address, table) for address in (
+        '1 Cardigan Road, Leeds LS6 1AA',   # its own postcode, inside
+        '2 Cardigan Road, Leeds LS6 1ZZ',   # unknown postcode, sector wholly inside
+        '3 Otley Road, Leeds LS6 2ZZ',      # unknown postcode, sector straddles the boundary
+        '4 Harehills Lane, Leeds LS9',      # district only
+        '5 Harehills Lane, Leeds LS9 8AA',  # its own postcode, outside
+    )]
+
+    assert tag_article4(listings, index, table) == 2
+
+    assert [l.get('is_article_4') for l in listings] == [True, True, None, None, False]
+    assert listings[1]['article_4_area'] == 'Headingley'
+
+
+def test_listings_stored_without_a_resolution_are_looked_up_again(table, index):
+    listing = geocoded('3 Otley Road, Leeds LS6 2ZZ', table)
+    del listing['geocode_resolution']
+
+    tag_article4([listing], index, table)
+
+    assert 'is_article_4' not in listing
+
+
+def test_built_index_is_cached_next_to_the_geojson(geojson_path, tmp_path):
+    built = load_index(geojson_path)
+    cached = load_index(geojson_path)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['areas.geojson', 'areas.geojson.idx.pickle']
+    assert cached.find(53.80, -1.55) == built.find(53.80, -1.55) == 'Headingley'
+    assert cached.find(53.70, -1.40) is None
@@ -0,0 +1,51 @@
+import os
+
+from crawl_journal import CrawlJournal
+
+PAGE_1 = 'https://www.primelocation.com/for-sale/property/leeds/?beds_min=4&pn=1'
+PAGE_2 = 'https://www.primelocation.com/for-sale/property/leeds/?beds_min=4&pn=2'
+
+
+def interrupted_journal(path):
+    """A run killed while writing page 2's listings"""
+    journal = CrawlJournal(str(path)).open()
+    journal.record_listing(PAGE_1, {'address': '1 Briggate, Leeds', 'price': 200000})
+    journal.record_listing(PAGE_1, {'address': '2 Briggate, Leeds', 'price': 210000})
+    journal.mark_url_done(PAGE_1, found=2)
+    journal.record_listing(PAGE_2, {'address': '3 Briggate, Leeds', 'price': 220000})
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "listing", "url": "' + PAGE_2)  # torn by the kill
+
+
+def test_resume_restores_listings_of_finished_urls_only(tmp_path):
+    path = tmp_path / 'query.jsonl'
+    interrupted_journal(path)
+
+    journal = CrawlJournal(str(path)).open()
+
+    assert journal.is_done(PAGE_1) and not journal.is_done(PAGE_2)
+    assert [l['address'] for l in journal.listings] == ['1 Briggate, Leeds', '2 Briggate, Leeds']
+    # Still appendable after the torn line
+    journal.mark_url_done(PAGE_2)
+    journal.close()
+    assert CrawlJournal(str(path)).open().done_urls == {PAGE_1, PAGE_2}
+
+
+def test_completed_or_fresh_runs_resume_nothing(tmp_path):
+    path = tmp_path / 'query.jsonl'
+    interrupted_journal(path)
+    fresh = CrawlJournal(str(path)).open(resume=False)
+    assert not fresh.done_urls and not fresh.listings
+
+    fresh.mark_url_done(PAGE_1)
+    fresh.complete()
+    assert not os.path.exists(path)
+    assert not CrawlJournal(str(path)).open().done_urls
+
+
+def test_journal_for_a_query_is_named_like_the_node_cache_key(tmp_path):
+    journal = CrawlJournal.for_query('Leeds', 4, 300000, 'HMO', str(tmp_path))
+
+    # md5("Leeds-4-300000-HMO"), as ScrapingService.generateSearchHash computes it
+    assert os.path.basename(journal.path) == '89b6e5c9a32cf2d3ce2ee45b84600eaa.jsonl'
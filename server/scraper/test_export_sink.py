@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from export_sink import export_listings, listings_to_table, scan
+
+SCRAPED_AT = 1760832000  # 2025-10-19 UTC
+
+
+def listing(n, price, bedrooms=4, **fields):
+    return dict({'title': f"{n} Briggate, Leeds", 'address': f"{n} Briggate, Leeds LS1 6HD", 'price': price,
+                 'bedrooms': bedrooms, 'gross_yield': 6.5,
+                 'property_url': f"https://www.zoopla.co.uk/for-sale/details/{n}/"}, **fields)
+
+
+def test_out_of_range_and_non_numeric_values_become_null():
+    listings = [listing(1, 10 ** 12, bedrooms=150, bathrooms='two', is_article_4='yes'),
+                listing(2, 200000, monthly_rent=float('nan'))]
+
+    rows = listings_to_table(listings, [SCRAPED_AT] * 2).to_pylist()
+
+    # Sorted by price, nulls last
+    assert [r['price'] for r in rows] == [200000, None]
+    assert rows[1]['bedrooms'] is None and rows[1]['bathrooms'] is None and rows[1]['is_article_4'] is None
+    assert rows[0]['bedrooms'] == 4 and rows[0]['monthly_rent'] is None
+
+
+def test_export_partitions_by_city_and_date_and_scans_filter_on_price(tmp_path):
+    listings = [listing(1, 150000), listing(2, 250000), listing(3, 90000, city='York')]
+
+    paths = export_listings(listings, str(tmp_path), 'Leeds', SCRAPED_AT)
+
+    assert sorted(p.split('/')[-3] for p in paths) == ['city=leeds', 'city=york']
+    assert all('scrape_date=2025-10-19' in p for p in paths)
+    cheap = scan(str(tmp_path), city='Leeds', max_price=200000)
+    assert cheap.column('price').to_pylist() == [150000]
@@ -0,0 +1,49 @@
+import os
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from gazetteer import DEFAULT_SOURCE_PATH, GAZETTEER_VERSION, get_gazetteer, load_gazetteer
+
+
+def test_names_aliases_slugs_and_postcodes_resolve_to_one_town():
+    gazetteer = get_gazetteer()
+
+    assert {gazetteer.resolve(q)['name'] for q in ('Hull', 'kingston-upon-hull', 'HU1 2AA')} == {'Kingston upon Hull'}
+    assert gazetteer.resolve('LS9 8AB')['name'] == 'Leeds'
+    # Names win over aliases: the county is its own entry, not a Leeds alias
+    assert gazetteer.resolve('West Yorkshire')['name'] == 'West Yorkshire'
+    assert gazetteer.resolve('Atlantis') is None
+
+
+def test_suggestions_follow_table_order_and_match_aliases():
+    gazetteer = get_gazetteer()
+
+    assert gazetteer.suggest('bri') == ['Bristol', 'Brighton and Hove']
+    assert 'Kingston upon Hull' in gazetteer.suggest('hu')
+    assert len(gazetteer.suggest('s', limit=3)) == 3
+
+
+def test_unknown_cities_get_the_default_rent_tier():
+    gazetteer = get_gazetteer()
+
+    assert gazetteer.rent_rates('Atlantis') == gazetteer.tiers[gazetteer.default_tier]
+    assert gazetteer.slug('Atlantis Bay') == 'atlantis-bay'
+
+
+def _load_town_count(path):
+    return len(load_gazetteer(path).towns)
+
+
+def test_concurrent_compiles_leave_one_complete_cache(tmp_path):
+    source = str(tmp_path / 'uk_towns.json')
+    shutil.copy(DEFAULT_SOURCE_PATH, source)
+
+    with ProcessPoolExecutor(4) as pool:
+        counts = list(pool.map(_load_town_count, [source] * 8))
+
+    assert len(set(counts)) == 1
+    assert sorted(os.listdir(tmp_path)) == ['uk_towns.json', 'uk_towns.json.idx.pickle']
+    with open(source + '.idx.pickle', 'rb') as f:
+        signature, tables = pickle.load(f)
+    assert signature[0] == GAZETTEER_VERSION and len(tables['towns']) == counts[0]
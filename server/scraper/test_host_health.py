@@ -0,0 +1,69 @@
+import types
+
+import pytest
+
+import host_health
+from host_health import CLOSED, COOLDOWN_S, FAILURE_THRESHOLD, HostHealth
+
+URL = 'https://www.zoopla.co.uk/for-sale/property/leeds/'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+    monkeypatch.setattr(host_health, 'time', types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def open_circuit(health):
+    for _ in range(FAILURE_THRESHOLD):
+        health.record_failure(URL, 'HTTP 403')
+
+
+def test_circuit_opens_after_repeated_failures_and_a_probe_closes_it(tmp_path, clock):
+    health = HostHealth(str(tmp_path / 'health.json'))
+    health.record_failure(URL, 'HTTP 403')
+    health.record_success(URL)  # a success in between resets the count
+    for _ in range(FAILURE_THRESHOLD - 1):
+        health.record_failure(URL, 'HTTP 403')
+    assert health.allow_request(URL) == CLOSED
+
+    health.record_failure(URL, 'HTTP 403')
+    assert health.is_open(URL) and health.allow_request(URL) is None
+    assert health.allow_request('https://www.primelocation.com/for-sale/') == CLOSED
+
+    clock[0] += COOLDOWN_S
+    assert health.allow_request(URL) == 'probe'
+    assert health.allow_request(URL) is None  # only one probe at a time
+    health.record_success(URL)
+    assert health.allow_request(URL) == CLOSED
+
+
+def test_failed_probe_doubles_the_cool_down(tmp_path, clock):
+    health = HostHealth(str(tmp_path / 'health.json'))
+    open_circuit(health)
+    clock[0] += COOLDOWN_S
+    assert health.allow_request(URL) == 'probe'
+
+    health.record_failure(URL, 'HTTP 403')
+
+    clock[0] += COOLDOWN_S
+    assert health.allow_request(URL) is None
+    clock[0] += COOLDOWN_S
+    assert health.allow_request(URL) == 'probe'
+
+
+def test_state_is_shared_with_other_processes_through_the_file(tmp_path, clock):
+    path = str(tmp_path / 'health.json')
+    open_circuit(HostHealth(path))
+
+    other = HostHealth(path)
+    assert other.allow_request(URL) is None
+
+    clock[0] += COOLDOWN_S
+    assert other.allow_request(URL) == 'probe'
+    # The claimed probe is on disk, so a third process doesn't send its own
+    assert HostHealth(path).allow_request(URL) is None
+    # An in-memory tracker (replay runs) never writes a file
+    open_circuit(HostHealth())
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['health.json', 'health.json.lock']
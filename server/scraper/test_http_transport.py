@@ -0,0 +1,66 @@
+import socket
+
+import pytest
+import requests
+
+from http_transport import HttpArchive, PortalRedirectAdapter, RecordingAdapter, ReplayAdapter
+
+
+def session_with(adapter):
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def closed_port_url():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/"
+
+
+def test_recorded_exchanges_replay_from_the_saved_archive(portal_url, tmp_path):
+    page, missing, down = f"{portal_url}/for-sale/property/leeds/?beds_min=4", f"{portal_url}/nowhere/", closed_port_url()
+    archive = HttpArchive()
+    recorder = session_with(RecordingAdapter(archive))
+    live = recorder.get(page)
+    assert recorder.get(missing).status_code == 404
+    with pytest.raises(requests.exceptions.ConnectionError):
+        recorder.get(down, timeout=2)
+    archive.save(str(tmp_path / 'run.zip'))
+
+    replay = session_with(ReplayAdapter(HttpArchive.load(str(tmp_path / 'run.zip'))))
+
+    replayed = replay.get(page)
+    assert (replayed.status_code, replayed.content, replayed.text) == (200, live.content, live.text)
+    assert replay.get(missing).status_code == 404
+    with pytest.raises(requests.exceptions.ConnectionError):
+        replay.get(down)
+    with pytest.raises(requests.exceptions.ConnectionError, match='No recorded response'):
+        replay.get(f"{portal_url}/for-sale/property/york/")
+
+
+def test_repeated_requests_replay_in_recorded_order_then_repeat_the_last():
+    url = 'https://www.zoopla.co.uk/for-sale/property/leeds/'
+    archive = HttpArchive()
+    archive.bodies = {'denied': b'denied', 'page': b'<html>listings</html>'}
+    archive.entries = [{'method': 'GET', 'url': url, 'status': status, 'headers': {}, 'body': body}
+                       for status, body in ((403, 'denied'), (200, 'page'))]
+    archive.entries.insert(1, {'method': 'GET', 'url': url, 'error': 'ReadTimeout', 'message': 'timed out'})
+    session = session_with(ReplayAdapter(archive))
+
+    assert session.get(url).status_code == 403
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.get(url)
+    assert [session.get(url).content for _ in range(2)] == [b'<html>listings</html>'] * 2
+
+
+def test_portal_redirect_answers_as_the_original_host(portal_url):
+    session = session_with(PortalRedirectAdapter(portal_url))
+
+    zoopla = session.get('https://www.zoopla.co.uk/for-sale/property/leeds/?beds_min=4')
+    prime = session.get('https://www.primelocation.com/for-sale/property/leeds/?beds_min=4')
+
+    assert zoopla.ok and prime.ok
+    assert 'data-testid="listing-card-content"' in zoopla.text
+    assert 'data-testid="listing-card-content"' not in prime.text and '<article' in prime.text
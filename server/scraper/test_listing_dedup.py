@@ -0,0 +1,38 @@
+from http_transport import build_transport
+from prime_scraper import details_listing_key, extract_listings_from_page, scrape_properties_with_requests
+from test_prime_scraper import search_page
+
+
+def test_claimed_cards_are_skipped_and_the_rest_parse_as_before(portal_url):
+    url, content = search_page(portal_url)
+    _, everything = extract_listings_from_page(content, url, 'Leeds', 4, 300000, seed=99)
+    keys = [details_listing_key(p.get('property_url')) for p in everything]
+    claimed = frozenset(keys[::2])
+
+    found, rest = extract_listings_from_page(content, url, 'Leeds', 4, 300000, seed=99, skip_keys=claimed)
+
+    assert found == len(everything) and len(keys) == len(set(keys)) > 2
+    assert [p.to_dict() for p in rest] == [p.to_dict() for p in everything[1::2]]
+
+
+def test_a_card_repeated_on_one_page_is_extracted_once(portal_url):
+    url, content = search_page(portal_url)
+    start = content.index(b'<div id="listing_')
+    end = content.index(b'<div id="listing_', start + 1)
+    doubled = content[:start] + content[start:end] + content[start:]
+
+    _, once = extract_listings_from_page(content, url, 'Leeds', 4, 300000, seed=1)
+    _, twice = extract_listings_from_page(doubled, url, 'Leeds', 4, 300000, seed=1)
+
+    assert [p['property_url'] for p in twice] == [p['property_url'] for p in once]
+
+
+def test_overlapping_search_urls_yield_each_listing_once(portal_url, capsys):
+    transport, _ = build_transport(portal_url=portal_url)
+
+    found = scrape_properties_with_requests('Leeds', 4, 300000, 'HMO', transport=transport)
+
+    # The stand-in ignores keywords, so the keyword and broad URLs return the same cards
+    assert 'cards already extracted from earlier search URLs' in capsys.readouterr().err
+    urls = [p['property_url'] for p in found]
+    assert urls and len(urls) == len(set(urls))
@@ -0,0 +1,66 @@
+import json
+import sys
+import threading
+
+import requests
+
+import load_harness
+from load_harness import percentile, summarise
+from mock_portal import create_server, listing_pool
+
+
+def result(latency_s, exit_code=0, listings=10, peak_rss_mb=50.0):
+    return {'city': 'Leeds', 'latency_s': latency_s, 'exit_code': exit_code, 'listings': listings,
+            'peak_rss_mb': peak_rss_mb, 'cpu_s': 1.0}
+
+
+def test_percentiles_are_nearest_rank():
+    values = list(range(1, 101))
+
+    assert [percentile(values, p) for p in (50, 90, 99, 100)] == [50, 90, 99, 100]
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([4, 1, 3, 2], 50) == 2
+
+
+def test_failed_searches_count_for_memory_but_not_latency_or_listings():
+    results = [result(1.0), result(2.0), result(60.0, exit_code=1, listings=0, peak_rss_mb=400.0)]
+
+    report = summarise(results, 4.0, {'zoopla 200': 12})
+
+    assert report['failed'] == 1
+    assert report['searches_per_s'] == 0.5 and report['listings_per_s'] == 5.0
+    assert report['latency_s']['max'] == 2.0
+    assert report['peak_rss_mb']['max'] == 400.0
+    assert summarise([], 0, None)['cpu_s_per_search'] == 0
+
+
+def test_stand_in_portal_filters_pages_and_injects_errors(portal_url):
+    def search(path, **headers):
+        return requests.get(portal_url + path, headers=headers, timeout=10)
+
+    page = search('/for-sale/property/leeds/?beds_min=6&price_max=200000', **{'X-Portal-Host': 'www.primelocation.com'})
+    expected = [l for l in listing_pool('leeds', 400) if l[1] >= 6 and l[3] <= 200000]
+    assert f'{len(expected)} results' in page.text
+    assert page.text.count('<article data-testid="search-result-') == min(25, len(expected))
+
+    failing = create_server(latency_ms=0, jitter_ms=0, rate_429=1.0)
+    try:
+        threading.Thread(target=failing.serve_forever, daemon=True).start()
+        refused = requests.get('http://127.0.0.1:%d/for-sale/property/leeds/' % failing.server_address[1], timeout=10)
+        assert refused.status_code == 429 and refused.headers['Retry-After'] == '30'
+        assert failing.stats == {'zoopla 429': 1}
+    finally:
+        failing.shutdown()
+        failing.server_close()
+
+
+def test_harness_runs_concurrent_scrapers_against_its_own_portal(monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['load_harness.py', '--searches', '2', '--concurrency', '2', '--cities', 'Leeds,York',
+                                      '--latency-ms', '0', '--jitter-ms', '0', '--parse-workers', '1'])
+
+    load_harness.main()
+
+    report = json.loads(capsys.readouterr().out)
+    assert report['searches'] == 2 and report['failed'] == 0
+    assert report['listings'] > 0 and report['peak_rss_mb']['max'] > 0
+    assert report['portal_requests'].get('zoopla 200', 0) > 0
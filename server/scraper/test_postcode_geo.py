@@ -0,0 +1,53 @@
+import pytest
+
+import postcode_geo
+from mock_portal import listing_pool
+from postcode_geo import PostcodeTable, compile_table, extract_postcode, geocode_address, normalise_postcode
+from prime_scraper import PageParser
+
+
+def write_table(tmp_path, rows):
+    csv_path = tmp_path / 'postcodes.csv'
+    csv_path.write_text('pcds,lat,long\n' + ''.join(f"{pc},{lat},{lon}\n" for pc, lat, lon in rows))
+    compile_table(str(csv_path), str(tmp_path / 'postcodes.bin'))
+    return PostcodeTable(str(tmp_path / 'postcodes.bin'))
+
+
+def test_postcodes_are_read_from_addresses():
+    assert extract_postcode('160 Briggate, Leeds ls98ab') == 'LS9 8AB'
+    assert extract_postcode('Flat 2, 5 Park Row, Leeds LS1 5HD, West Yorkshire') == 'LS1 5HD'
+    # An outward code alone is only trusted at the end of the address
+    assert extract_postcode('160 Briggate, Leeds LS9.') == 'LS9'
+    assert extract_postcode('LS9 Works, Leeds') is None
+    assert normalise_postcode(' ls9  8ab ') == 'LS9 8AB'
+
+
+def test_compiled_table_holds_units_sector_and_district_centroids(tmp_path):
+    table = write_table(tmp_path, [('LS9 8AB', 53.80, -1.52), ('LS9 8AD', 53.82, -1.50), ('LS9 9ZZ', 53.84, -1.54),
+                                   ('LS9 7QQ', 99.999999, 0.0)])  # ONS: no grid reference
+
+    assert table.lookup('ls98ab') == pytest.approx((53.80, -1.52), abs=1e-5)
+    assert table.lookup('LS9 8ZZ') == pytest.approx((53.81, -1.51), abs=1e-5)  # unknown unit: its sector
+    assert table.lookup('LS9') == pytest.approx((53.82, -1.52), abs=1e-5)
+    assert table.lookup('LS9 7QQ') == table.lookup('LS9')
+    assert geocode_address('Somewhere without a postcode', table) == (None, None, None, None)
+    table.close()
+
+
+def test_search_page_listings_keep_their_postcode_and_coordinates(portal_url, tmp_path, monkeypatch):
+    pool = listing_pool('leeds', 400)
+    rows = {extract_postcode(address): (53.0 + i / 1000, -1.5) for i, (_, _, _, _, address, _) in enumerate(pool)}
+    table = write_table(tmp_path, [(pc, lat, lon) for pc, (lat, lon) in rows.items()])
+    monkeypatch.setattr(postcode_geo, '_default_table', table)
+    monkeypatch.setattr(postcode_geo, '_default_table_loaded', True)
+    from test_prime_scraper import search_page
+    url, content = search_page(portal_url)
+
+    _, listings = PageParser(workers=1).submit(content, url, 'Leeds', 4, 300000, 1).result()
+
+    assert listings
+    for listing in listings:
+        assert listing['postcode'] in rows
+        assert (listing['latitude'], listing['longitude']) == pytest.approx(rows[listing['postcode']], abs=1e-5)
+        assert listing['geocode_resolution'] == 'unit'
+    table.close()
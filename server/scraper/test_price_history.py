@@ -0,0 +1,54 @@
+from price_history import EVENT_DROP, PriceHistory, listing_key
+
+DAY = 86400
+T0 = 1_700_000_000
+
+
+def listing(listing_id, price, address='12 Briggate, Leeds LS1 6HD'):
+    return {'property_url': f'https://www.zoopla.co.uk/for-sale/details/{listing_id}/', 'price': price, 'address': address}
+
+
+def test_runs_emit_new_drop_and_rise_events_against_the_last_price(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    first = history.record_run([listing(1, 200000), listing(2, 150000), listing(1, 200000)], 'Leeds', ts=T0)
+    assert [(e['event'], e['new_price']) for e in first] == [('new', 200000), ('new', 150000)]
+
+    second = [listing(1, 180000), listing(2, 160000), listing(3, 90000)]
+    events = history.record_run(second, 'Leeds', ts=T0 + 3 * DAY)
+
+    assert [(e['event'], e['old_price'], e['new_price']) for e in events] == [
+        ('drop', 200000, 180000), ('rise', 150000, 160000), ('new', None, 90000)]
+    assert events[0]['drop_pct'] == 10.0
+    assert second[0]['previous_price'] == 200000 and second[0]['days_on_market'] == 3
+    assert second[2]['days_on_market'] == 0
+
+    # Unchanged prices produce nothing
+    assert history.record_run([listing(1, 180000)], 'Leeds', ts=T0 + 4 * DAY) == []
+
+
+def test_recent_drops_are_filtered_by_time_and_city(tmp_path):
+    history = PriceHistory(str(tmp_path))
+    history.record_run([listing(1, 200000), listing(2, 100000)], 'Leeds', ts=T0)
+    history.record_run([listing(10, 300000)], 'York', ts=T0)
+    history.record_run([listing(1, 190000)], 'Leeds', ts=T0 + DAY)
+    history.record_run([listing(10, 250000)], 'York', ts=T0 + 2 * DAY)
+    history.record_run([listing(2, 90000)], 'Leeds', ts=T0 + 9 * DAY)
+
+    reopened = PriceHistory(str(tmp_path))
+    recent = reopened.events_since(T0 + 2 * DAY, kind=EVENT_DROP)
+    leeds = reopened.events_since(T0 + DAY, kind=EVENT_DROP, city='leeds')
+
+    assert [(e['city'], e['new_price']) for e in recent] == [('york', 250000), ('leeds', 90000)]
+    assert [e['new_price'] for e in leeds] == [190000, 90000]
+    assert leeds[0]['url'] == listing(1, 0)['property_url']
+    assert reopened.events_since(T0, city='Bristol') == []
+
+
+def test_listings_without_a_details_link_are_keyed_by_address():
+    search_url = 'https://www.zoopla.co.uk/for-sale/property/leeds/?pn=2'
+    a = {'property_url': search_url, 'address': '12 Briggate, Leeds'}
+    b = {'property_url': search_url, 'address': '3 Hyde Park Road, Leeds'}
+
+    assert listing_key(a) != listing_key(b)
+    assert listing_key(a) == listing_key({'address': '12 BRIGGATE, Leeds'})
+    assert listing_key(listing(7, 0)) != listing_key({**listing(7, 0), 'property_url': listing(7, 0)['property_url'].replace('zoopla', 'primelocation')})
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+import requests
+
+from http_transport import build_transport
+from prime_scraper import PageParser, TopKTracker, bedroom_bound, scrape_properties_with_requests
+
+BAND_URL = 'https://www.zoopla.co.uk/for-sale/property/leeds/?beds_min=4&price_min={}&price_max=300000&q=HMO'
+
+
+def listing(address, price, bedrooms, gross_yield):
+    return {'address': address, 'price': price, 'bedrooms': bedrooms, 'gross_yield': gross_yield}
+
+
+def test_bedroom_bound_ignores_rare_outliers_but_not_min_bedrooms():
+    bedrooms = [4] * 20 + [12]
+
+    assert bedroom_bound(bedrooms, 4) == 4
+    assert bedroom_bound(bedrooms, 4, quantile=1.0) == 12
+    assert bedroom_bound(bedrooms, 6) == 6
+    assert bedroom_bound([], 4) is None
+
+
+def test_repeats_and_generic_addresses_do_not_fill_the_heap():
+    tracker = TopKTracker(2, 4, max_rent_per_room=150)
+    for _ in range(3):
+        tracker.track(listing('12 Briggate, Leeds LS1 6HD', 90000, 5, 20.0))
+    tracker.track(listing('Property in Leeds', 60000, 4, 40.0))
+    tracker.track(listing('3 Hyde Park Road, Leeds LS6 1AH', 110000, 4, 8.0))
+
+    assert sorted(tracker.best_scores) == [8.0, 20.0]
+    assert tracker.bedrooms == [5, 4]
+
+
+def test_band_is_skipped_once_the_kth_best_beats_its_bound():
+    tracker = TopKTracker(2, 4, max_rent_per_room=150)
+    tracker.track(listing('12 Briggate, Leeds LS1 6HD', 90000, 5, 20.0))
+    assert not tracker.can_skip(BAND_URL.format(180000))  # heap not full yet
+    tracker.track(listing('3 Hyde Park Road, Leeds LS6 1AH', 110000, 4, 18.0))
+
+    # 150/room x 5 beds x 12 / £180k = 5%
+    assert tracker.bound(BAND_URL.format(180000)) == pytest.approx(5.0)
+    assert tracker.can_skip(BAND_URL.format(180000))
+    # A cheap enough band could still beat 18%
+    assert not tracker.can_skip(BAND_URL.format(30000))
+    assert not tracker.can_skip(BAND_URL.replace('price_min={}&', ''))
+
+
+def test_top_k_search_skips_dearer_price_bands(portal_url, capsys):
+    transport, _ = build_transport(portal_url=portal_url)
+
+    found = scrape_properties_with_requests('Leeds', 4, 300000, 'HMO', transport=transport, top_k=3)
+
+    log = capsys.readouterr().err
+    assert 'skipping this price band' in log
+    assert 'skipped 0 of' not in log
+    assert len(found) == 3
+    assert [p['gross_yield'] for p in found] == sorted((p['gross_yield'] for p in found), reverse=True)
+
+
+def search_page(portal_url, host='www.zoopla.co.uk'):
+    url = f"https://{host}/for-sale/property/leeds/?beds_min=4&price_max=300000"
+    return url, build_transport(portal_url=portal_url)[0].send(requests.Request('GET', url).prepare()).content
+
+
+def test_pool_and_inline_parsing_give_identical_listings(portal_url):
+    url, content = search_page(portal_url)
+    pool, inline = PageParser(workers=2), PageParser(workers=1)
+    try:
+        pooled = pool.submit(content, url, 'Leeds', 4, 300000, 1234).result()
+        parsed = inline.submit(content, url, 'Leeds', 4, 300000, 1234).result()
+    finally:
+        pool.shutdown()
+
+    assert pooled[0] == parsed[0] > 0
+    assert [p.to_dict() for p in pooled[1]] == [p.to_dict() for p in parsed[1]]
+
+
+def test_inline_parsing_leaves_the_callers_random_sequence_alone(portal_url):
+    url, content = search_page(portal_url)
+    random.seed(5)
+    expected = [random.random() for _ in range(3)]
+
+    random.seed(5)
+    PageParser(workers=1).submit(content, url, 'Leeds', 4, 300000, 1234)
+
+    assert [random.random() for _ in range(3)] == expected
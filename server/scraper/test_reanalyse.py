@@ -0,0 +1,75 @@
+import json
+import sys
+
+import reanalyse
+from prime_scraper import ANALYSIS_FIELDS
+from warm_cache import write_warm
+
+
+def stale(listing_id, price, bedrooms=5):
+    return {'address': f'{listing_id} Briggate, Leeds LS1 6HD', 'price': price, 'bedrooms': bedrooms,
+            'property_url': f'https://www.zoopla.co.uk/for-sale/details/{listing_id}/',
+            'gross_yield': 99.0, 'profitability_score': 'stale'}
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['reanalyse.py', *args])
+    reanalyse.main()
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_default_run_rewrites_the_warm_cache_and_is_stable(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('SCRAPER_WARM_CACHE_DIR', str(tmp_path))
+    write_warm('Leeds', 4, 300000, 'HMO', [stale(1, 150000), stale(2, 0)])
+    entry = next(tmp_path.glob('*.json'))
+
+    run(monkeypatch)
+
+    first = read(entry)['properties']
+    assert first[0]['gross_yield'] != 99.0 and first[0]['profitability_score'] != 'stale'
+    assert set(first[0]) >= {'gross_yield', 'profitability_score'} and 'monthly_rent' not in first[0]
+    assert first[1]['gross_yield'] == 99.0  # no price: left alone
+    assert '1/2 listings changed, 1 skipped' in capsys.readouterr().err
+
+    run(monkeypatch)
+    assert read(entry)['properties'] == first
+    assert '0/2 listings changed' in capsys.readouterr().err
+
+
+def test_node_cache_listings_bring_their_own_city(tmp_path, monkeypatch):
+    path = tmp_path / 'scrape_cache.json'
+    path.write_text(json.dumps({'abc': {'timestamp': 1, 'properties': [dict(stale(1, 150000), city='Leeds'), stale(2, 150000)]}}))
+
+    run(monkeypatch, str(path))
+
+    cached = read(path)['abc']['properties']
+    assert cached[0]['gross_yield'] != 99.0
+    assert cached[1]['gross_yield'] == 99.0  # no city anywhere for this one
+
+
+def test_jsonl_needs_a_city_and_dry_run_writes_nothing(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'listings.jsonl'
+    original = ''.join(json.dumps(stale(i, 100000 + i * 10000)) + '\n' for i in range(5))
+    path.write_text(original)
+
+    run(monkeypatch, str(path), '--city', 'Leeds', '--dry-run', '--batch-size', '2')
+    assert path.read_text() == original
+    assert '5 would change' in capsys.readouterr().err
+
+    run(monkeypatch, str(path), '--city', 'Leeds', '--batch-size', '2')
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(rows) == 5 and all(row['gross_yield'] != 99.0 for row in rows)
+    assert [row['price'] for row in rows] == [100000 + i * 10000 for i in range(5)]
+
+
+def test_every_metric_is_written_when_the_listing_has_none():
+    listing = {'address': '3 Hyde Park Road, Leeds LS6 1AH', 'price': 150000, 'bedrooms': 4}
+
+    assert reanalyse.reanalyse_listing(listing, 'Leeds') is True
+    assert set(ANALYSIS_FIELDS) <= set(listing)
+    assert reanalyse.reanalyse_listing(dict(listing), 'Leeds') is False
+    assert 'city' not in listing
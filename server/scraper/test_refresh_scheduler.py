@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+import refresh_scheduler
+from http_transport import CountingAdapter, PortalRedirectAdapter
+from prime_scraper import open_journal, run_search
+from refresh_scheduler import load_query_stats, plan_refreshes
+
+NOW = 1_700_000_000
+HOUR = 3600
+
+
+class CountingPortalAdapter(CountingAdapter, PortalRedirectAdapter):
+    """Budgeted transport aimed at the stand-in portal"""
+
+
+def write_log(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(e if isinstance(e, str) else json.dumps(e) + '\n' for e in entries))
+
+
+def test_query_log_is_read_across_rotation_and_weighted_by_recency(tmp_path):
+    log = str(tmp_path / 'query_log.jsonl')
+    write_log(log + '.1', [
+        {'ts': NOW - 100 * HOUR, 'city': 'Leeds', 'minBedrooms': 4, 'maxPrice': 300000},  # outside the window
+        {'ts': (NOW - 2 * HOUR) * 1000, 'city': 'leeds', 'minBedrooms': 4, 'maxPrice': 300000},
+    ])
+    write_log(log, [
+        'not json\n',
+        {'ts': NOW, 'city': 'Leeds ', 'minBedrooms': '4', 'maxPrice': 300000, 'keywords': 'HMO'},
+        {'ts': NOW - HOUR, 'city': 'York'},
+        {'ts': NOW, 'city': ''},
+    ])
+
+    stats = load_query_stats(log, 72 * HOUR, 2 * HOUR, now=NOW)
+
+    leeds = stats[('leeds', 4, 300000, 'HMO')]
+    assert leeds['count'] == 2 and leeds['weight'] == pytest.approx(1.5)
+    assert leeds['query'] == ('Leeds', 4, 300000, 'HMO')  # the latest spelling
+    assert stats[('york', 1, 500000, 'HMO')]['count'] == 1
+    assert len(stats) == 2
+
+
+def test_plan_takes_the_hottest_queries_not_fresh_in_the_warm_cache(monkeypatch):
+    ages = {'Leeds': 100, 'York': 3500, 'Bristol': None, 'Hull': None}
+    monkeypatch.setattr(refresh_scheduler, 'entry_age', lambda city, *rest: ages[city])
+    stats = {city: {'query': (city, 4, 300000, 'HMO'), 'count': 1, 'weight': weight}
+             for city, weight in (('Leeds', 9.0), ('York', 5.0), ('Bristol', 3.0), ('Hull', 1.0))}
+
+    plan = plan_refreshes(stats, ttl_s=3600, lead_s=300, top=2)
+
+    assert [job['query'][0] for job in plan] == ['York', 'Bristol']
+
+
+def test_search_cut_short_by_the_budget_keeps_its_journal_for_the_next_run(portal_url, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    journal = open_journal('Leeds', 4, 300000, 'HMO', journal_dir=str(tmp_path))
+    budget = CountingPortalAdapter(portal_url, limit=2)
+
+    run_search('Leeds', 4, 300000, 'HMO', journal=journal, transport=budget, warm=False)
+    journal.close()
+
+    assert budget.requests_sent == 2 and budget.refused > 0
+    assert os.path.exists(journal.path)
+
+    resumed = open_journal('Leeds', 4, 300000, 'HMO', journal_dir=str(tmp_path))
+    assert len(resumed.done_urls) == 2
+    unlimited = CountingPortalAdapter(portal_url)
+    found = run_search('Leeds', 4, 300000, 'HMO', journal=resumed, transport=unlimited, warm=False)
+
+    assert found and unlimited.refused == 0
+    assert not os.path.exists(journal.path)
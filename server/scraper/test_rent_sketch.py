@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from gazetteer import get_gazetteer
+from http_transport import build_transport
+from prime_scraper import extract_rent_listings_from_page, scrape_rent_comparables, setup_session
+from rent_sketch import MIN_SAMPLES, RentDigest, RentSketches
+
+RENT_URL = 'https://www.zoopla.co.uk/to-rent/property/leeds/?beds_min=1'
+
+
+def test_merged_digests_match_one_digest_of_every_rent():
+    rents = list(range(1, 10001))
+    random.Random(7).shuffle(rents)
+    merged = RentDigest()
+    for part in range(4):
+        digest = RentDigest()
+        for rent in rents[part::4]:
+            digest.add(rent)
+        merged.merge(digest)
+
+    assert merged.count == 10000
+    assert (merged.min, merged.max) == (1, 10000)
+    assert len(merged.centroids) < 200
+    for q in (0.05, 0.5, 0.95):
+        assert merged.quantile(q) == pytest.approx(q * 10000, rel=0.02)
+
+
+def test_district_rents_win_once_it_has_enough_and_the_city_fills_in_otherwise():
+    sketches = RentSketches()
+    for i in range(MIN_SAMPLES - 1):
+        sketches.add('Leeds', 'LS6 1AH', 800)
+    assert sketches.band_rates('Leeds', '3 Hyde Park Road, Leeds LS6 1AH') is None
+
+    sketches.add('Leeds', 'LS6 1AH', 800)
+    for i in range(MIN_SAMPLES):
+        sketches.add('Leeds', 'LS1 6HD', 400)
+
+    ls6 = sketches.band_rates('Leeds', '3 Hyde Park Road, Leeds LS6 1AH')
+    ls1 = sketches.band_rates('Leeds', '12 Briggate, Leeds LS1 6HD')
+    city = sketches.band_rates('Leeds', '1 Otley Road, Leeds LS16 5AA')
+    assert ls6['budget'][0] > ls1['premium'][1]
+    assert ls1['budget'][0] <= city['good'][0] <= ls6['budget'][0]
+
+
+def test_weekly_and_whole_property_rents_become_monthly_per_room():
+    page = ('<div data-testid="listing-card-content"><h2>4 bed terraced house to rent</h2>'
+            '<address>3 Hyde Park Road, Leeds LS6 1AH</address><p>£2,000 pcm</p></div>'
+            '<div data-testid="listing-card-content"><h2>Double room to rent</h2>'
+            '<address>12 Briggate, Leeds LS1 6HD</address><p>£120 pw</p></div>')
+
+    rents = extract_rent_listings_from_page(page.encode(), RENT_URL)
+
+    assert [(postcode, rent) for _, postcode, rent in rents] == [('LS6 1AH', 500), ('LS1 6HD', 520)]
+
+
+def test_observed_rent_bands_land_on_the_rent_tables_scale(portal_url):
+    transport, _ = build_transport(portal_url=portal_url)
+
+    sketches = scrape_rent_comparables('Leeds', setup_session(transport))
+
+    table = get_gazetteer().rent_rates('Leeds')
+    observed = sketches.band_rates('Leeds', '')
+    assert sketches.count >= MIN_SAMPLES
+    # The stand-in portal spreads rents over the whole table, budget low to premium high
+    assert table['budget'][0] <= observed['budget'][0] < table['good'][0]
+    assert table['premium'][0] <= observed['premium'][1] <= table['premium'][1]
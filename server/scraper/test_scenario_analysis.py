@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+
+import scenario_analysis
+from scenario_analysis import DEFAULT_ASSUMPTIONS, annotate_scenarios, listing_bands, listing_scenarios, scenario_draws
+
+
+def listing(**fields):
+    return dict({'address': '12 Briggate, Leeds LS1 6HD', 'price': 150000, 'bedrooms': 5}, **fields)
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    scenario_draws.cache_clear()
+    listing_scenarios.cache_clear()
+    yield
+    scenario_draws.cache_clear()
+    listing_scenarios.cache_clear()
+
+
+def test_listing_without_a_city_is_refused_unless_one_is_given():
+    with pytest.raises(ValueError):
+        listing_bands(listing(), None)
+    assert listing_bands(listing(), 'Leeds') == listing_bands(listing(city='Leeds'), None)
+
+
+def test_listing_city_sets_the_rent_bands():
+    london, leeds = listing(city='London'), listing(city='Leeds')
+
+    annotate_scenarios([london, leeds], None, draws=500)
+
+    assert london['scenarios']['gross_yield']['p50'] > leeds['scenarios']['gross_yield']['p50']
+    p = leeds['scenarios']['gross_yield']
+    assert p['p10'] <= p['p50'] <= p['p90']
+
+
+def test_pure_python_path_matches_numpy_in_distribution(monkeypatch):
+    pytest.importorskip('numpy')
+    bands = listing_bands(listing(), 'Leeds')
+    vectorised, _ = listing_scenarios(150000, 5, bands, 4000, 1, DEFAULT_ASSUMPTIONS)
+
+    monkeypatch.setattr(scenario_analysis, 'np', None)
+    scenario_draws.cache_clear()
+    listing_scenarios.cache_clear()
+    pure, _ = listing_scenarios(150000, 5, bands, 4000, 1, DEFAULT_ASSUMPTIONS)
+
+    for vectorised_p, pure_p in zip(vectorised[0], pure[0]):
+        assert pure_p == pytest.approx(vectorised_p, rel=0.05)
+
+
+def test_cli_fails_when_listings_have_no_city(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'results.json'
+    path.write_text('[{"address": "12 Briggate, Leeds LS1 6HD", "price": 150000, "bedrooms": 5}]')
+    monkeypatch.setattr(sys, 'argv', ['scenario_analysis.py', str(path), '--draws', '100'])
+
+    with pytest.raises(SystemExit):
+        scenario_analysis.main()
+    assert 'pass --city' in capsys.readouterr().err
@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from spatial_index import SpatialIndex, apply_spatial_filter, haversine_miles
+
+CENTRE = (53.80, -1.55)
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(3)
+    return [{'id': i, 'latitude': CENTRE[0] + rng.uniform(-0.3, 0.3), 'longitude': CENTRE[1] + rng.uniform(-0.5, 0.5)}
+            for i in range(500)]
+
+
+def by_distance(points, lat, lon):
+    return sorted(points, key=lambda p: haversine_miles(lat, lon, p['latitude'], p['longitude']))
+
+
+def test_radius_and_bbox_match_a_full_scan(points):
+    index = SpatialIndex.from_listings(points)
+
+    near = index.within_radius(*CENTRE, 3.0)
+    expected = [p for p in by_distance(points, *CENTRE)
+                if haversine_miles(*CENTRE, p['latitude'], p['longitude']) <= 3.0]
+    assert [p['id'] for _, p in near] == [p['id'] for p in expected]
+
+    boxed = index.within_bbox(53.75, -1.60, 53.85, -1.50)
+    assert sorted(p['id'] for p in boxed) == sorted(
+        p['id'] for p in points if 53.75 <= p['latitude'] <= 53.85 and -1.60 <= p['longitude'] <= -1.50)
+
+
+@pytest.mark.parametrize('origin', [CENTRE, (53.95, -1.20), (51.50, -0.12)])
+def test_nearest_matches_a_full_scan_inside_and_far_outside_the_data(points, origin):
+    # The last origin is far enough away to take the scan-everything path
+    index = SpatialIndex.from_listings(points)
+
+    found = index.nearest(*origin, 7)
+
+    assert [p['id'] for _, p in found] == [p['id'] for p in by_distance(points, *origin)[:7]]
+    assert index.nearest(*origin, 0) == [] and SpatialIndex().nearest(*origin, 3) == []
+
+
+def test_filter_drops_listings_without_coordinates_and_records_distance(points):
+    listings = points[:20] + [{'id': 'no-coords'}]
+
+    nearest = apply_spatial_filter(listings, near=CENTRE, nearest=3)
+
+    assert [p['id'] for p in nearest] == [p['id'] for p in by_distance(points[:20], *CENTRE)[:3]]
+    assert nearest[0]['distance_miles'] <= nearest[2]['distance_miles']
+    assert apply_spatial_filter(listings, near=CENTRE) is listings  # no radius or count: nothing to filter
@@ -0,0 +1,33 @@
+from work_queue import WorkQueue
+
+SEARCH_URL = 'https://www.zoopla.co.uk/for-sale/property/leeds/?beds_min=4&price_max=300000&q=HMO'
+
+
+def leased_task(queue, worker_id='w1'):
+    queue.enqueue('Leeds', 4, 300000, 'HMO')
+    return queue.claim(worker_id)
+
+
+def test_linkless_listings_on_one_page_are_all_kept(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'))
+    task = leased_task(queue)
+    # Cards without a /details/ link all carry the search page URL
+    listings = [{'title': f"{n} Briggate, Leeds", 'address': f"{n} Briggate, Leeds", 'price': 200000 + n,
+                 'bedrooms': 4, 'property_url': SEARCH_URL} for n in range(1, 6)]
+    # Flats in one building share an address
+    listings += [{'title': 'Flat, Park Square, Leeds', 'address': 'Flat, Park Square, Leeds', 'price': price,
+                  'bedrooms': 4, 'property_url': SEARCH_URL} for price in (150000, 165000)]
+
+    assert queue.complete(task, 'w1', listings)
+    assert [l['address'] for l in queue.run_listings(task['run_id'])] == [l['address'] for l in listings]
+
+
+def test_same_portal_listing_is_stored_once_per_run(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.sqlite'))
+    task = leased_task(queue)
+    listing = {'address': '1 Briggate, Leeds', 'price': 200000, 'bedrooms': 4,
+               'property_url': 'https://www.zoopla.co.uk/for-sale/details/12345678/'}
+
+    assert queue.complete(task, 'w1', [listing, dict(listing, price=195000)])
+    assert len(queue.run_listings(task['run_id'])) == 1
+    assert queue.claimed_keys(task['run_id'])
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Scraper-side result cache kept warm by refresh_scheduler.py.
+
+Every completed scrape is written here under the same key the Node cache uses
+(crawl_journal.query_key). When ScrapingService spawns the scraper for a query
+whose entry is younger than SCRAPER_WARM_TTL, the stored listings are returned
+immediately instead of scraping the portals again.
+"""
+import os
+import sys
+import json
+import time
+
+from crawl_journal import query_key
+
+WARM_TTL_S = float(os.environ.get('SCRAPER_WARM_TTL', '1800'))
+
+
+def default_warm_dir():
+    configured = os.environ.get('SCRAPER_WARM_CACHE_DIR')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/warm_cache'
+    return os.path.join('.local', 'warm_cache')
+
+
+def _entry_path(city, min_bedrooms, max_price, keywords, warm_dir=None):
+    return os.path.join(warm_dir or default_warm_dir(), query_key(city, min_bedrooms, max_price, keywords) + '.json')
+
+
+def entry_age(city, min_bedrooms, max_price, keywords, warm_dir=None):
+    """Seconds since the entry was written, or None if there is no entry"""
+    try:
+        return time.time() - os.path.getmtime(_entry_path(city, min_bedrooms, max_price, keywords, warm_dir))
+    except OSError:
+        return None
+
+
+def read_warm(city, min_bedrooms, max_price, keywords, warm_dir=None, ttl=WARM_TTL_S):
+    """Stored listings for the query if the entry is fresher than ttl, else None"""
+    age = entry_age(city, min_bedrooms, max_price, keywords, warm_dir)
+    if age is None or age > ttl:
+        return None
+    try:
+        with open(_entry_path(city, min_bedrooms, max_price, keywords, warm_dir), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    print(f"🔥 Warm cache hit for {city} ({int(age)}s old, {len(entry['properties'])} properties)", file=sys.stderr)
+    return entry['properties']
+
+
+def write_warm(city, min_bedrooms, max_price, keywords, properties, warm_dir=None):
+    """Store serialised listings for the query (atomic replace)"""
+    path = _entry_path(city, min_bedrooms, max_price, keywords, warm_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        'query': {'city': city, 'min_bedrooms': min_bedrooms, 'max_price': max_price, 'keywords': keywords},
+        'scraped_at': time.time(),
+        'properties': properties,
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
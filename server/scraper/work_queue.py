@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""Durable SQLite work queue for crawls split across worker processes.
+
+The coordinator (enqueue) expands each query into one task per search URL
+and results page. Any number of workers claim tasks under a lease, fetch and
+parse them, and write the listings back. A worker that dies simply lets
+its lease expire, and the task is handed to the next worker that asks.
+Failed fetches are retried with backoff until MAX_ATTEMPTS, after which the
+task is marked failed. collect deduplicates a finished run's listings and
+finalises it like a normal scrape: Article 4 tags, price history and the
+warm cache.
+
+The database lives at SCRAPER_WORK_QUEUE (/tmp in production, .local
+otherwise) and uses SQLite's rollback journal, not WAL: WAL's shared-memory
+index only works for processes on one host. Workers on several machines can
+share the file over a network filesystem only if its byte-range locks are
+reliable (e.g. NFSv4 with locking enabled). Many NFS and SMB setups get
+locking wrong, and SQLite then corrupts the database, so where that isn't
+guaranteed run every worker on one host.
+
+Per-host request spacing is kept in the same database, so the politeness
+limit holds across every worker sharing the file, not per process. Workers
+given separate queue files each get their own limit.
+
+    python3 work_queue.py enqueue Leeds 4 300000 HMO --pages 3
+    python3 work_queue.py enqueue --popular 20          # hottest queries from the query log
+    python3 work_queue.py work                          # run one per worker process
+    python3 work_queue.py collect --wait                # finalise every finished run
+    python3 work_queue.py collect Leeds 4 300000 HMO    # print one run's listings
+    python3 work_queue.py status
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import socket
+import sqlite3
+import argparse
+
+import prime_scraper
+from prime_scraper import (build_search_urls, deduplicate_properties, details_listing_key,
+                           extract_listings_from_page, listing_to_dict, setup_session)
+from article4 import tag_article4
+from crawl_journal import query_key
+from host_health import HostHealth, default_health_path, host_of
+from http_transport import build_transport
+from price_history import PriceHistory, listing_key, summarise_events
+from warm_cache import write_warm
+
+LEASE_S = 120
+MAX_ATTEMPTS = 4
+RETRY_BASE_S = 30
+# Minimum spacing between requests to one host, across all workers (scaled by SCRAPER_DELAY_SCALE)
+HOST_INTERVAL_S = float(os.environ.get('SCRAPER_HOST_INTERVAL', '1.0'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    query_key TEXT NOT NULL,
+    city TEXT NOT NULL,
+    min_bedrooms INTEGER NOT NULL,
+    max_price INTEGER NOT NULL,
+    keywords TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    collected_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_query ON runs (query_key, id);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    url TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    found INTEGER,
+    last_error TEXT,
+    UNIQUE (run_id, url)
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, not_before);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL,
+    listing_key TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    listing TEXT NOT NULL,
+    PRIMARY KEY (run_id, listing_key)
+);
+CREATE TABLE IF NOT EXISTS host_slots (
+    host TEXT PRIMARY KEY,
+    next_at REAL NOT NULL
+);
+"""
+
+
+def default_queue_path():
+    configured = os.environ.get('SCRAPER_WORK_QUEUE')
+    if configured:
+        return configured
+    if os.environ.get('NODE_ENV') == 'production':
+        return '/tmp/work_queue.sqlite'
+    return os.path.join('.local', 'work_queue.sqlite')
+
+
+def result_key(listing):
+    """A listing's key within a run: its portal listing id, else a hash of address, price and bedrooms
+
+    Cards without a /details/ link carry their search page's URL, so neither that
+    URL nor the address alone tells two such listings apart.
+    """
+    key = details_listing_key(listing.get('property_url'))
+    if key is None:
+        key = listing_key({'address': f"{listing.get('address')}|{listing.get('price')}|{listing.get('bedrooms')}"})
+    return str(key)
+
+
+def page_urls(url, pages):
+    """The search URL plus its results pages 2..pages"""
+    return [url] + [f"{url}&pn={page}" for page in range(2, pages + 1)]
+
+
+class WorkQueue:
+    def __init__(self, path=None):
+        self.path = path or default_queue_path()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Autocommit; multi-statement changes take the write lock up front with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        # Rollback journal: WAL needs shared memory, which doesn't reach workers on other hosts
+        self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self):
+        return _Transaction(self.db)
+
+    def enqueue(self, city, min_bedrooms, max_price, keywords, pages=1):
+        """Run id for the query: its unfinished run if there is one, else a new run with fresh tasks"""
+        key = query_key(city, min_bedrooms, max_price, keywords)
+        with self._transaction():
+            row = self.db.execute(
+                "SELECT r.id FROM runs r WHERE r.query_key = ? AND EXISTS "
+                "(SELECT 1 FROM tasks t WHERE t.run_id = r.id AND t.state IN ('pending', 'leased')) "
+                "ORDER BY r.id DESC LIMIT 1", (key,)).fetchone()
+            if row:
+                print(f"⏭️ {city} already queued as run {row['id']}", file=sys.stderr)
+                return row['id']
+            run_id = self.db.execute(
+                "INSERT INTO runs (query_key, city, min_bedrooms, max_price, keywords, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, city, min_bedrooms, max_price, keywords, time.time())).lastrowid
+            urls = [u for url in build_search_urls(city, min_bedrooms, max_price, keywords) for u in page_urls(url, pages)]
+            self.db.executemany("INSERT OR IGNORE INTO tasks (run_id, url) VALUES (?, ?)", [(run_id, u) for u in urls])
+        print(f"📥 Run {run_id}: {city} {min_bedrooms}+ beds ≤ £{max_price} '{keywords}' as {len(urls)} tasks", file=sys.stderr)
+        return run_id
+
+    def claim(self, worker_id, lease_s=LEASE_S):
+        """Lease the next due task (pending, or leased by a worker whose lease ran out); None if none is due"""
+        now = time.time()
+        with self._transaction():
+            self.db.execute("UPDATE tasks SET state = 'failed', lease_owner = NULL, last_error = 'lease expired' "
+                            "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+            task = self.db.execute(
+                "SELECT t.*, r.city, r.min_bedrooms, r.max_price FROM tasks t JOIN runs r ON r.id = t.run_id "
+                "WHERE (t.state = 'pending' AND t.not_before <= ?) OR (t.state = 'leased' AND t.lease_expires < ?) "
+                "ORDER BY t.id LIMIT 1", (now, now)).fetchone()
+            if task is None:
+                return None
+            if task['state'] == 'leased':
+                print(f"♻️ Lease of {task['lease_owner']} on task {task['id']} expired, retrying", file=sys.stderr)
+            self.db.execute("UPDATE tasks SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                            "WHERE id = ?", (worker_id, now + lease_s, task['id']))
+        return dict(task, attempts=task['attempts'] + 1)
+
+    def claimed_keys(self, run_id):
+        """Listing keys already stored for the run, so workers skip those cards before parsing"""
+        return frozenset(int(row[0]) for row in self.db.execute("SELECT listing_key FROM results WHERE run_id = ?", (run_id,)))
+
+    def complete(self, task, worker_id, listings):
+        """Store a task's listings and mark it done; False if the lease was lost to another worker meanwhile"""
+        with self._transaction():
+            updated = self.db.execute("UPDATE tasks SET state = 'done', found = ?, lease_owner = NULL, last_error = NULL "
+                                      "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                                      (len(listings), task['id'], worker_id)).rowcount
+            if not updated:
+                return False
+            self.db.executemany(
+                "INSERT OR IGNORE INTO results (run_id, listing_key, task_id, listing) VALUES (?, ?, ?, ?)",
+                [(task['run_id'], result_key(l), task['id'], json.dumps(l, ensure_ascii=False)) for l in listings])
+        return True
+
+    def fail(self, task, worker_id, error):
+        """Give the task back for a later retry with backoff, or mark it failed after MAX_ATTEMPTS"""
+        if task['attempts'] >= MAX_ATTEMPTS:
+            state, not_before = 'failed', 0
+        else:
+            state, not_before = 'pending', time.time() + RETRY_BASE_S * 2 ** (task['attempts'] - 1)
+        self.db.execute("UPDATE tasks SET state = ?, not_before = ?, lease_owner = NULL, last_error = ? "
+                        "WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                        (state, not_before, error, task['id'], worker_id))
+        return state
+
+    def postpone(self, task, worker_id, delay, reason):
+        """Give the task back untried (the attempt isn't counted), due again after delay seconds"""
+        self.db.execute("UPDATE tasks SET state = 'pending', not_before = ?, attempts = attempts - 1, lease_owner = NULL, "
+                        "last_error = ? WHERE id = ? AND state = 'leased' AND lease_owner = ?",
+                        (time.time() + delay, reason, task['id'], worker_id))
+        return 'postponed'
+
+    def reserve_host_slot(self, url, interval):
+        """Book the next request slot for url's host; returns the seconds to wait before sending"""
+        host = host_of(url)
+        now = time.time()
+        with self._transaction():
+            row = self.db.execute("SELECT next_at FROM host_slots WHERE host = ?", (host,)).fetchone()
+            start = max(now, row['next_at'] if row else 0)
+            self.db.execute("INSERT INTO host_slots (host, next_at) VALUES (?, ?) "
+                            "ON CONFLICT (host) DO UPDATE SET next_at = excluded.next_at", (host, start + interval))
+        return start - now
+
+    def open_tasks(self):
+        return self.db.execute("SELECT COUNT(*) FROM tasks WHERE state IN ('pending', 'leased')").fetchone()[0]
+
+    def latest_run(self, city, min_bedrooms, max_price, keywords):
+        return self.db.execute("SELECT * FROM runs WHERE query_key = ? ORDER BY id DESC LIMIT 1",
+                               (query_key(city, min_bedrooms, max_price, keywords),)).fetchone()
+
+    def finished_runs(self):
+        """Runs with no pending or leased tasks that haven't been collected yet"""
+        return self.db.execute(
+            "SELECT * FROM runs r WHERE r.collected_at IS NULL AND NOT EXISTS "
+            "(SELECT 1 FROM tasks t WHERE t.run_id = r.id AND t.state IN ('pending', 'leased')) ORDER BY r.id").fetchall()
+
+    def run_listings(self, run_id):
+        """The run's listings in task order (the order a single-process scrape would have found them)"""
+        return [json.loads(row[0]) for row in
+                self.db.execute("SELECT listing FROM results WHERE run_id = ? ORDER BY task_id, rowid", (run_id,))]
+
+    def mark_collected(self, run_id):
+        self.db.execute("UPDATE runs SET collected_at = ? WHERE id = ?", (time.time(), run_id))
+
+    def status(self):
+        return [dict(row) for row in self.db.execute(
+            "SELECT r.id AS run, r.city, r.min_bedrooms, r.max_price, r.keywords, "
+            "SUM(t.state = 'pending') AS pending, SUM(t.state = 'leased') AS leased, "
+            "SUM(t.state = 'done') AS done, SUM(t.state = 'failed') AS failed, "
+            "(SELECT COUNT(*) FROM results s WHERE s.run_id = r.id) AS listings, r.collected_at IS NOT NULL AS collected "
+            "FROM runs r JOIN tasks t ON t.run_id = r.id GROUP BY r.id ORDER BY r.id")]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
+
+
+def process_task(queue, task, worker_id, session, host_health=None, host_interval=HOST_INTERVAL_S):
+    """Fetch and parse one leased task, then report it done or failed"""
+    url = task['url']
+    if host_health and host_health.allow_request(url) is None:
+        return queue.postpone(task, worker_id, RETRY_BASE_S, 'circuit open')
+
+    wait = queue.reserve_host_slot(url, host_interval * prime_scraper.DELAY_SCALE)
+    if wait > 0:
+        time.sleep(wait)
+
+    try:
+        response = session.get(url, timeout=30, allow_redirects=True)
+    except Exception as e:
+        if host_health:
+            host_health.record_failure(url, type(e).__name__)
+        return queue.fail(task, worker_id, f"{type(e).__name__}: {e}")
+    if response.status_code != 200:
+        if host_health:
+            host_health.record_failure(url, f"HTTP {response.status_code}")
+        return queue.fail(task, worker_id, f"HTTP {response.status_code}")
+    if host_health:
+        host_health.record_success(url)
+
+    # Seeded per URL, so whichever worker parses a page produces the same estimates
+    _, properties = extract_listings_from_page(response.content, url, task['city'], task['min_bedrooms'],
+                                               task['max_price'], seed=zlib.crc32(url.encode('utf-8')),
+                                               skip_keys=queue.claimed_keys(task['run_id']))
+    listings = [listing_to_dict(p) for p in properties]
+    if not queue.complete(task, worker_id, listings):
+        print(f"⚠️ Lost the lease on task {task['id']}, discarding its {len(listings)} listings", file=sys.stderr)
+        return 'lost'
+    return 'done'
+
+
+def run_worker(queue, worker_id, transport=None, host_health=None, lease_s=LEASE_S, max_tasks=None,
+               keep_running=False, poll_s=5.0):
+    """Claim and process tasks until none are left (or forever with keep_running); returns tasks processed"""
+    session = setup_session(transport)
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        task = queue.claim(worker_id, lease_s)
+        if task is None:
+            if not keep_running and not queue.open_tasks():
+                break
+            time.sleep(poll_s)  # tasks are leased elsewhere or waiting out a retry backoff
+            continue
+        outcome = process_task(queue, task, worker_id, session, host_health)
+        processed += 1
+        print(f"{'✅' if outcome == 'done' else '⚠️'} Task {task['id']} ({task['city']}) {outcome}: {task['url'][:80]}...",
+              file=sys.stderr)
+    print(f"🏁 Worker {worker_id} processed {processed} tasks", file=sys.stderr)
+    return processed
+
+
+def collect_run(queue, run, history=None, warm=True):
+    """Deduplicate and finalise a run's listings like run_search does; returns them serialised"""
+    listings = deduplicate_properties(queue.run_listings(run['id']))
+    tag_article4(listings)
+    query = (run['city'], run['min_bedrooms'], run['max_price'], run['keywords'])
+    if listings and history:
+        try:
+            counts = summarise_events(history.record_run(listings, run['city']))
+            print(f"📈 Price history: {counts.get('new', 0)} new listings, {counts.get('drop', 0)} price drops, {counts.get('rise', 0)} rises", file=sys.stderr)
+        except OSError as e:
+            print(f"⚠️ Price history unavailable ({e}), continuing without it", file=sys.stderr)
+    if listings and warm:
+        try:
+            write_warm(*query, listings)
+        except OSError as e:
+            print(f"⚠️ Couldn't write warm cache: {e}", file=sys.stderr)
+    queue.mark_collected(run['id'])
+    print(f"📦 Run {run['id']} ({run['city']}): {len(listings)} listings collected", file=sys.stderr)
+    return listings
+
+
+def query_arguments(parser, required):
+    nargs = None if required else '?'
+    parser.add_argument('city', nargs=nargs)
+    parser.add_argument('min_bedrooms', type=int, nargs=nargs)
+    parser.add_argument('max_price', type=int, nargs=nargs)
+    parser.add_argument('keywords', nargs=nargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durable work queue for crawls split across workers")
+    parser.add_argument('--queue', default=default_queue_path(), help="Queue database")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help="Expand queries into page tasks")
+    query_arguments(enqueue, required=False)
+    enqueue.add_argument('--pages', type=int, default=1, help="Results pages per search URL")
+    enqueue.add_argument('--popular', type=int, metavar='TOP', help="Queue the TOP queries due for refresh from the query log")
+
+    work = sub.add_parser('work', help="Claim and process tasks")
+    work.add_argument('--worker-id', default=f"{socket.gethostname()}:{os.getpid()}")
+    work.add_argument('--lease', type=float, default=LEASE_S, help="Seconds a claimed task stays leased")
+    work.add_argument('--max-tasks', type=int, default=None)
+    work.add_argument('--keep-running', action='store_true', help="Wait for new tasks instead of exiting when idle")
+    work.add_argument('--portal-url', default=os.environ.get('SCRAPER_PORTAL_URL'),
+                      help="Send requests to a stand-in portal (mock_portal.py)")
+
+    collect = sub.add_parser('collect', help="Finalise finished runs (one query's listings are printed as JSON)")
+    query_arguments(collect, required=False)
+    collect.add_argument('--wait', action='store_true', help="Wait until the queue has no open tasks")
+    collect.add_argument('--no-history', action='store_true', help="Don't record the runs in the price history")
+    collect.add_argument('--no-warm-cache', action='store_true', help="Don't store the runs in the warm cache")
+
+    sub.add_parser('status', help="Task counts per run")
+    args = parser.parse_args()
+
+    queue = WorkQueue(args.queue)
+    if args.command == 'enqueue':
+        if args.popular:
+            from refresh_scheduler import default_query_log_path, load_query_stats, plan_refreshes
+            from warm_cache import WARM_TTL_S
+            stats = load_query_stats(default_query_log_path(), 72 * 3600, 12 * 3600)
+            for job in plan_refreshes(stats, WARM_TTL_S, 300, args.popular):
+                queue.enqueue(*job['query'], pages=args.pages)
+        elif args.keywords:
+            queue.enqueue(args.city, args.min_bedrooms, args.max_price, args.keywords, pages=args.pages)
+        else:
+            parser.error("enqueue needs a query (city min_bedrooms max_price keywords) or --popular")
+    elif args.command == 'work':
+        transport, _ = build_transport(portal_url=args.portal_url)
+        try:
+            host_health = HostHealth(None if args.portal_url else default_health_path())
+        except OSError as e:
+            print(f"⚠️ Host health state unavailable ({e}), continuing without circuit breaker", file=sys.stderr)
+            host_health = None
+        prime_scraper.install_sigterm_handler(queue.close)
+        run_worker(queue, args.worker_id, transport, host_health, args.lease, args.max_tasks, args.keep_running)
+    elif args.command == 'collect':
+        while args.wait and queue.open_tasks():
+            time.sleep(5)
+        history = None if args.no_history else PriceHistory()
+        if args.keywords:
+            run = queue.latest_run(args.city, args.min_bedrooms, args.max_price, args.keywords)
+            if run is None:
+                print(f"❌ No run queued for {args.city}", file=sys.stderr)
+                sys.exit(1)
+            print(json.dumps(collect_run(queue, run, history, not args.no_warm_cache), ensure_ascii=False, indent=2))
+        else:
+            runs = queue.finished_runs()
+            for run in runs:
+                collect_run(queue, run, history, not args.no_warm_cache)
+            print(f"✅ Collected {len(runs)} runs", file=sys.stderr)
+    else:
+        print(json.dumps(queue.status(), indent=2))
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
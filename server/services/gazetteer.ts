@@ -0,0 +1,83 @@
+import fs from 'fs';
+import path from 'path';
+
+// Same source table the Python scraper compiles (server/scraper/gazetteer.py)
+const SOURCE_PATH = process.env.SCRAPER_GAZETTEER || path.join(process.cwd(), 'server', 'data', 'uk_towns.json');
+const SUGGESTION_LIMIT = 10;
+
+interface TownEntry {
+  name: string;
+  slug: string;
+  kind?: string;
+  aliases?: string[];
+  postcode_areas?: string[];
+  address_hints?: string[];
+}
+
+function normalise(name: string): string {
+  return name.toLowerCase().replace(/&/g, ' and ').replace(/['.]/g, '').replace(/[^a-z0-9]+/g, ' ').trim();
+}
+
+class Gazetteer {
+  private towns: TownEntry[] = [];
+  private exact = new Map<string, TownEntry>();
+  private prefixes = new Map<string, TownEntry[]>();
+
+  constructor(sourcePath: string) {
+    try {
+      this.towns = JSON.parse(fs.readFileSync(sourcePath, 'utf-8')).towns;
+    } catch (error) {
+      console.warn(`⚠️ Gazetteer unavailable (${sourcePath}):`, error);
+      return;
+    }
+
+    const aliases = new Map<string, TownEntry>();
+    for (const town of this.towns) {
+      for (const key of [normalise(town.name), normalise(town.slug)]) {
+        if (!this.exact.has(key)) this.exact.set(key, town);
+      }
+      for (const alias of town.aliases || []) {
+        if (!aliases.has(normalise(alias))) aliases.set(normalise(alias), town);
+      }
+      // Flattened prefix trie: every prefix maps straight to its first matches in table order
+      for (const key of new Set([town.name, ...(town.aliases || [])].map(normalise))) {
+        for (let end = 1; end <= key.length; end++) {
+          const matches = this.prefixes.get(key.slice(0, end)) || [];
+          if (!matches.includes(town) && matches.length < SUGGESTION_LIMIT) matches.push(town);
+          this.prefixes.set(key.slice(0, end), matches);
+        }
+      }
+    }
+    aliases.forEach((town, key) => {
+      if (!this.exact.has(key)) this.exact.set(key, town);
+    });
+  }
+
+  resolve(city: string): TownEntry | undefined {
+    return this.exact.get(normalise(city));
+  }
+
+  // Every place in table order: towns, then counties
+  names(): string[] {
+    return this.towns.map(town => town.name);
+  }
+
+  suggest(prefix: string, limit = SUGGESTION_LIMIT): string[] {
+    return (this.prefixes.get(normalise(prefix)) || []).slice(0, limit).map(town => town.name);
+  }
+
+  // Alternative names and wider areas an address in this city may mention
+  addressAliases(city: string): string[] {
+    const town = this.resolve(city);
+    return town ? [...(town.aliases || []), ...(town.address_hints || [])] : [];
+  }
+}
+
+let instance: Gazetteer | null = null;
+
+export function getGazetteer(): Gazetteer {
+  if (!instance) {
+    instance = new Gazetteer(SOURCE_PATH);
+  }
+  return instance;
+}
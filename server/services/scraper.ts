@@ -3,6 +3,7 @@ import path from 'path';
 import crypto from 'crypto';
 import fs from 'fs/promises';
 import { pythonSetup } from '../utils/python-setup.js';
+import { getGazetteer } from './gazetteer.js';
 
 export interface SearchParams {
   city: string;
@@ -35,6 +36,7 @@ export interface Property {
   hasGarden: boolean;
   hasParking: boolean;
   isArticle4: boolean;
+  article4Area?: string;
   yearlyProfit: number;
   leftInDeal: number;
   isExpandedResult?: boolean;
@@ -57,6 +59,10 @@ export class ScrapingService {
   private cache: CacheData = {};
   private readonly cacheFile = process.env.NODE_ENV === 'production' ? '/tmp/scrape_cache.json' : '.local/scrape_cache.json';
   private readonly rateLimitMs = process.env.NODE_ENV === 'production' ? 300000 : 60000; // Cache for 5 minutes in production, 1 minute in dev
+  // Read by server/scraper/refresh_scheduler.py to keep popular searches warm
+  private readonly queryLogFile = process.env.SCRAPER_QUERY_LOG || (process.env.NODE_ENV === 'production' ? '/tmp/query_log.jsonl' : '.local/query_log.jsonl');
+  // Past this size the log is rotated to <file>.1 (one generation kept), which bounds what the scheduler reads
+  private readonly queryLogMaxBytes = 5 * 1024 * 1024;
 
   constructor() {
     this.loadCache();
@@ -90,6 +96,29 @@ export class ScrapingService {
     }
   }
 
+  private async logQuery(params: SearchParams): Promise<void> {
+    try {
+      if (!this.queryLogFile.startsWith('/tmp/')) {
+        await fs.mkdir(path.dirname(this.queryLogFile), { recursive: true });
+      }
+      const entry = {
+        ts: Date.now(),
+        city: params.city,
+        minBedrooms: params.minBedrooms || 1,
+        maxPrice: params.maxPrice || 500000,
+        keywords: params.keywords || 'HMO'
+      };
+      const stat = await fs.stat(this.queryLogFile).catch(() => null);
+      if (stat && stat.size > this.queryLogMaxBytes) {
+        await fs.rename(this.queryLogFile, `${this.queryLogFile}.1`).catch(() => undefined);
+      }
+      await fs.appendFile(this.queryLogFile, JSON.stringify(entry) + '\n');
+    } catch (error) {
+      // Query log only feeds the refresh scheduler - never fail a search over it
+      console.error('Error writing query log:', error);
+    }
+  }
+
   private generateSearchHash(params: SearchParams): string {
     const key = `${params.city}-${params.minBedrooms || 1}-${params.maxPrice || 500000}-${params.keywords || 'HMO'}`;
     return crypto.createHash('md5').update(key).digest('hex');
@@ -182,20 +211,7 @@ export class ScrapingService {
   }
 
   private getCityAliases(city: string): string[] {
-    const aliases: Record<string, string[]> = {
-      'london': ['sw1', 'w1', 'ec1', 'nw1', 'se1', 'e1', 'n1', 'wc1', 'greater london'],
-      'manchester': ['mcr', 'greater manchester'],
-      'birmingham': ['bham', 'west midlands'],
-      'liverpool': ['merseyside'],
-      'leeds': ['west yorkshire'],
-      'sheffield': ['south yorkshire'],
-      'bristol': ['gloucestershire'],
-      'glasgow': ['lanarkshire'],
-      'edinburgh': ['lothian'],
-      'cardiff': ['wales', 'cymru']
-    };
-    
-    return aliases[city.toLowerCase()] || [];
+    return getGazetteer().addressAliases(city);
   }
 
   async getCachedResults(params: SearchParams): Promise<Property[]> {
@@ -326,8 +342,8 @@ export class ScrapingService {
       
       // Add additional fields if available
       if (prop.postcode) propertyObj.postcode = prop.postcode;
-      if (prop.latitude) propertyObj.latitude = prop.latitude;
-      if (prop.longitude) propertyObj.longitude = prop.longitude;
+      if (prop.latitude != null) propertyObj.latitude = prop.latitude;
+      if (prop.longitude != null) propertyObj.longitude = prop.longitude;
       if (prop.description) propertyObj.description = prop.description;
       if (prop.area_sqm) propertyObj.area_sqm = prop.area_sqm;
       
@@ -336,7 +352,7 @@ export class ScrapingService {
         'lha_weekly', 'gross_yield', 'net_yield', 'roi', 'payback_years',
         'monthly_cashflow', 'yearly_profit', 'total_invested', 'stamp_duty',
         'refurb_cost', 'dscr', 'profitability_score', 'left_in_deal',
-        'has_garden', 'has_parking', 'is_article_4'
+        'has_garden', 'has_parking'
       ];
       
       investmentFields.forEach(field => {
@@ -345,6 +361,10 @@ export class ScrapingService {
         }
       });
       
+      // Article 4 direction tagging (left unset by the scraper when it can't tell)
+      if (typeof prop.is_article_4 === 'boolean') propertyObj.isArticle4 = prop.is_article_4;
+      if (prop.article_4_area) propertyObj.article4Area = prop.article_4_area;
+      
       // Portal URLs
       if (prop.rightmove_url) propertyObj.rightmoveUrl = prop.rightmove_url;
       if (prop.zoopla_url) propertyObj.zooplaUrl = prop.zoopla_url;
@@ -533,6 +553,7 @@ export class ScrapingService {
   async searchProperties(params: SearchParams): Promise<Property[]> {
     try {
       console.log(`🔍 Starting search for ${params.city} with minBedrooms: ${params.minBedrooms}, maxPrice: ${params.maxPrice}`);
+      this.logQuery(params);
       
       const canScrape = await this.canScrapeNow(params);
       
@@ -1,5 +1,6 @@
 import { type User, type InsertUser, type Property } from "@shared/schema";
 import { scrapingService } from "./services/scraper";
+import { getGazetteer } from "./services/gazetteer";
 
 // Define PropertySearchParams locally since we removed the generator
 export interface PropertySearchParams {
@@ -52,7 +53,7 @@ export interface IStorage {
   getUserByUsername(username: string): Promise<User | undefined>;
   createUser(user: InsertUser): Promise<User>;
   getProperties(params: PropertySearchParams): Promise<PropertySearchResult>;
-  getCities(): Promise<string[]>;
+  getCities(prefix?: string): Promise<string[]>;
 }
 
 export class MemStorage implements IStorage {
@@ -232,16 +233,17 @@ export class MemStorage implements IStorage {
     
     return {
       ...property,
-      postcode,
-      latitude: coords.lat + (Math.random() - 0.5) * 0.1,
-      longitude: coords.lng + (Math.random() - 0.5) * 0.1,
+      // Scraped postcode and its geocoded centroid win over the generated stand-ins
+      postcode: property.postcode ?? postcode,
+      latitude: property.latitude ?? coords.lat + (Math.random() - 0.5) * 0.1,
+      longitude: property.longitude ?? coords.lng + (Math.random() - 0.5) * 0.1,
       rightmoveUrl,
       zooplaUrl,
       primeLocationUrl,
       description: `${bedrooms} bedroom HMO property in ${city}. Great investment opportunity with strong rental yield potential.`,
       hasGarden: Math.random() > 0.6,
       hasParking: Math.random() > 0.7,
-      isArticle4: Math.random() > 0.8,
+      isArticle4: property.isArticle4 ?? false,
       yearlyProfit: Math.round(netYearlyIncome),
       leftInDeal: Math.round(totalCashInvested),
       // JARVIS-accurate analytics
@@ -259,8 +261,19 @@ export class MemStorage implements IStorage {
     };
   }
 
-  async getCities(): Promise<string[]> {
-    // Return list of UK cities supported by our scraper
+  async getCities(prefix?: string): Promise<string[]> {
+    // Typeahead: constant-time prefix lookup in the gazetteer
+    if (prefix && prefix.trim()) {
+      return getGazetteer().suggest(prefix);
+    }
+
+    // Every place the gazetteer knows - the scraper resolves the same table
+    const names = getGazetteer().names();
+    if (names.length) {
+      return names;
+    }
+
+    // Gazetteer unreadable: the cities the scraper was first built for
     return [
       'London', 'Liverpool', 'Birmingham', 'Manchester', 'West Yorkshire', 'Sheffield', 
       'Bristol', 'County Down', 'Nottingham', 'Leicester', 'Coventry',
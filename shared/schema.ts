@@ -33,6 +33,7 @@ export const propertySchema = z.object({
   hasGarden: z.boolean(),
   hasParking: z.boolean(),
   isArticle4: z.boolean(),
+  article4Area: z.string().optional(),
   yearlyProfit: z.number(),
   leftInDeal: z.number(),
   isExpandedResult: z.boolean().optional(),